@@ -0,0 +1,94 @@
+r"""
+    :copyright: (c) 2021 by Zaid Ali (email@xarty.xyz) / Hazem Meqdad(hazemmeqdad@gmail.com).
+    :license: MIT, see LICENSE for more details.
+
+    Compares decoding a GUILD_CREATE with the json and the etf gateway encodings.
+    Run it with `python benchmarks/gateway_encoding.py [members]`.
+"""
+
+import sys
+import time
+import random
+import typing
+
+from pylemon.etf import ETFCodec
+from pylemon.codec import get_codec
+
+def snowflake() -> int:
+    return random.randint(10 ** 17, 10 ** 18)
+
+def guild_create(members: int) -> typing.Dict[str, typing.Any]:
+    guild_id = snowflake()
+    roles = [snowflake() for _ in range(50)]
+    return {
+        'op': 0,
+        's': 1,
+        't': 'GUILD_CREATE',
+        'd': {
+            'id': guild_id,
+            'name': 'benchmark',
+            'owner_id': snowflake(),
+            'large': True,
+            'member_count': members,
+            'roles': [
+                {'id': role, 'name': f'role {i}', 'color': 0, 'position': i, 'permissions': '104324673', 'managed': False}
+                for i, role in enumerate(roles)
+            ],
+            'channels': [
+                {'id': snowflake(), 'guild_id': guild_id, 'name': f'channel {i}', 'type': 0, 'position': i, 'permission_overwrites': []}
+                for i in range(100)
+            ],
+            'members': [
+                {
+                    'user': {'id': snowflake(), 'username': f'user {i}', 'discriminator': '0001', 'avatar': None, 'bot': False},
+                    'roles': random.sample(roles, 3),
+                    'nick': None,
+                    'joined_at': '2021-01-01T00:00:00.000000+00:00',
+                    'deaf': False,
+                    'mute': False,
+                }
+                for i in range(members)
+            ],
+        },
+    }
+
+def stringify(obj: typing.Any) -> typing.Any:
+    """Turns the snowflakes to strings like discord's json encoding does."""
+    if isinstance(obj, dict):
+        return {key: stringify(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [stringify(value) for value in obj]
+    if isinstance(obj, int) and not isinstance(obj, bool) and obj > 2 ** 53:
+        return str(obj)
+    return obj
+
+def snowflakes(payload: typing.Dict[str, typing.Any]) -> None:
+    """Does the snowflake conversions the models do on a GUILD_CREATE."""
+    data = payload['d']
+    int(data['id'])
+    for member in data['members']:
+        int(member['user']['id'])
+        [int(role) for role in member['roles']]
+    for role in data['roles']:
+        int(role['id'])
+    for channel in data['channels']:
+        int(channel['id'])
+
+def bench(name: str, decode: typing.Callable[[bytes], typing.Any], raw: bytes, rounds: int) -> None:
+    start = time.perf_counter()
+    for _ in range(rounds):
+        snowflakes(decode(raw))
+    elapsed = (time.perf_counter() - start) / rounds
+    print(f'{name:>8}: {len(raw) / 1024:8.1f} KiB  {elapsed * 1000:8.2f} ms/decode')
+
+def main(members: int = 5000, rounds: int = 20) -> None:
+    payload = guild_create(members)
+    etf = ETFCodec()
+    json = get_codec()
+
+    print(f'GUILD_CREATE with {members} members, decode + snowflake conversion')
+    bench(json.name, json.loads, json.dumps(stringify(payload)).encode('utf-8'), rounds)
+    bench(etf.name, etf.loads, etf.dumps(payload), rounds)
+
+if __name__ == '__main__':
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 5000)
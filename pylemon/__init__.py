@@ -13,6 +13,8 @@ from .client import Client
 from .plugin import Plugin
 from .events import Events
 from .intents import Intents
+from .cache import CachePolicy
+from .errors import PylemonException, HTTPException, Forbidden, NotFound, DiscordServerError, ConnectionClosed
 
 from .ext import Bot
 from .ext import has_permission, before_command
@@ -4,7 +4,6 @@ r"""
 """
 
 import typing
-import json
 import asyncio
 
 from pylemon.types.message import Embed
@@ -58,7 +57,7 @@ class APIClient:
 
     async def channel_get(self, channel_id: int) -> "ChannelsTypes":
         r =  await self.client.http.request(
-            Route(f'/channels/{channel_id}', 'GET')
+            Route('/channels/{channel_id}', 'GET', channel_id=channel_id)
         )
         return deserialize_channel(self.client, r)
 
@@ -72,26 +71,26 @@ class APIClient:
 
     async def channel_delete(self, channel_id: int, reason: str=None) -> "ChannelsTypes":
         r = await self.client.http.request(
-            Route(f'/channels/{channel_id}', 'DELETE'),
+            Route('/channels/{channel_id}', 'DELETE', channel_id=channel_id),
             headears=_reason(reason)
         )
         return deserialize_channel(self.client, r)
 
     async def channel_typing(self, channel_id: int) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/typing', 'POST')
+            Route('/channels/{channel_id}/typing', 'POST', channel_id=channel_id)
         )
     
     async def channel_message_list(self, channel_id: int, limit: int=100) -> typing.List["Message"]:
         r = await self.client.http.request(
-            Route(f'/channels/{channel_id}/messages', 'GET'),
+            Route('/channels/{channel_id}/messages', 'GET', channel_id=channel_id),
             params={'limit': limit}
         )
         return [Message(self.client,m) for m in r]
 
     async def channel_message_get(self, channel_id: int, message_id: int) -> "Message":
         r = await self.client.http.request(
-            Route(f'/channels/{channel_id}/messages/{message_id}', 'GET')
+            Route('/channels/{channel_id}/messages/{message_id}', 'GET', channel_id=channel_id, message_id=message_id)
         )
         return Message(self.client, r)
 
@@ -107,8 +106,8 @@ class APIClient:
         **kwargs
     ) -> "Message":
         r = await self.client.http.request(
-            Route(f'/channels/{channel_id}/messages', 'POST'),
-            data={'payload_json': json.dumps({
+            Route('/channels/{channel_id}/messages', 'POST', channel_id=channel_id),
+            data={'payload_json': self.client.codec.dumps({
                 'content': content,
                 'embed': embeds,
                 'tts': tts,
@@ -128,7 +127,7 @@ class APIClient:
         embeds: typing.List["Embed"]=[]
     ) -> "Message":
         r = await self.client.http.request(
-            Route(f'/channels/{channel_id}/messages/{message_id}', 'PATCH'),
+            Route('/channels/{channel_id}/messages/{message_id}', 'PATCH', channel_id=channel_id, message_id=message_id),
             json={
                 'content': content,
                 'embed': [embed.to_dict() for embed in embeds],
@@ -143,7 +142,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/messages/{message_id}', 'DELETE'),
+            Route('/channels/{channel_id}/messages/{message_id}', 'DELETE', channel_id=channel_id, message_id=message_id),
             headears=_reason(reason)
         )
 
@@ -154,7 +153,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/messages', 'DELETE'),
+            Route('/channels/{channel_id}/messages', 'DELETE', channel_id=channel_id),
             json={'messages': message_ids},
             headears=_reason(reason)
         )
@@ -166,7 +165,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/pins/{message_id}', 'PUT'),
+            Route('/channels/{channel_id}/pins/{message_id}', 'PUT', channel_id=channel_id, message_id=message_id),
             headears=_reason(reason)
         )
 
@@ -178,7 +177,7 @@ class APIClient:
         limit: int=100
     ) -> typing.List["Reaction"]:
         r = await self.client.http.request(
-            Route(f'/channels/{channel_id}/messages/{message_id}/reactions/{emoji.name}:{emoji.id}', 'GET'),
+            Route('/channels/{channel_id}/messages/{message_id}/reactions/{emoji}', 'GET', channel_id=channel_id, message_id=message_id, emoji=f'{emoji.name}:{emoji.id}'),
             params={'limit': limit}
         )
         return [Reaction(self.client, r) for r in r]
@@ -190,7 +189,7 @@ class APIClient:
         emoji: "Emoji"
     ) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/messages/{message_id}/reactions/{emoji.name}:{emoji.id}/@me', 'PUT')
+            Route('/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me', 'PUT', channel_id=channel_id, message_id=message_id, emoji=f'{emoji.name}:{emoji.id}')
         )
 
     async def channel_message_reaction_delete_emoji(
@@ -200,7 +199,7 @@ class APIClient:
         emoji: "Emoji"
     ) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/messages/{message_id}/reactions/{emoji.name}:{emoji.id}/@me', 'DELETE')
+            Route('/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/@me', 'DELETE', channel_id=channel_id, message_id=message_id, emoji=f'{emoji.name}:{emoji.id}')
         )
 
     async def channel_message_reaction_user_delete_emoji(
@@ -211,7 +210,7 @@ class APIClient:
         emoji: "Emoji"
     ) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/messages/{message_id}/reactions/{emoji.name}:{emoji.id}/{user_id}', 'DELETE')
+            Route('/channels/{channel_id}/messages/{message_id}/reactions/{emoji}/{user_id}', 'DELETE', channel_id=channel_id, message_id=message_id, emoji=f'{emoji.name}:{emoji.id}', user_id=user_id)
         )
 
     async def channel_permissions_modfiy(
@@ -224,7 +223,7 @@ class APIClient:
         reason: str=None,
     ) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/permissions/{overwrite_id}', 'PUT'),
+            Route('/channels/{channel_id}/permissions/{overwrite_id}', 'PUT', channel_id=channel_id, overwrite_id=overwrite_id),
             json={
                 'allow': allow,
                 'deny': deny,
@@ -240,7 +239,7 @@ class APIClient:
         reason: str=None,
     ) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/permissions/{overwrite_id}', 'DELETE'),
+            Route('/channels/{channel_id}/permissions/{overwrite_id}', 'DELETE', channel_id=channel_id, overwrite_id=overwrite_id),
             headears=_reason(reason)
         )
     
@@ -250,7 +249,7 @@ class APIClient:
         limit: int=100
     ) -> typing.List["Invite"]:
         r = await self.client.http.request(
-            Route(f'/channels/{channel_id}/invites', 'GET'),
+            Route('/channels/{channel_id}/invites', 'GET', channel_id=channel_id),
             params={'limit': limit}
         )
         return [Invite(self.client, i) for i in r]
@@ -265,7 +264,7 @@ class APIClient:
         reason: str=None
     ) -> "Invite":
         r = await self.client.http.request(
-            Route(f'/channels/{channel_id}/invites', 'POST'),
+            Route('/channels/{channel_id}/invites', 'POST', channel_id=channel_id),
             json={
                 'max_age': max_age,
                 'max_uses': max_uses,
@@ -283,7 +282,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/invites/{code}', 'DELETE'),
+            Route('/channels/{channel_id}/invites/{code}', 'DELETE', channel_id=channel_id, code=code),
             headears=_reason(reason)
         )
 
@@ -293,7 +292,7 @@ class APIClient:
         limit: int=100
     ) -> typing.List["Message"]:
         r = await self.client.http.request(
-            Route(f'/channels/{channel_id}/pins', 'GET'),
+            Route('/channels/{channel_id}/pins', 'GET', channel_id=channel_id),
             params={'limit': limit}
         )
         return [Message(self.client, m) for m in r]
@@ -305,7 +304,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/pins/{message_id}', 'PUT'),
+            Route('/channels/{channel_id}/pins/{message_id}', 'PUT', channel_id=channel_id, message_id=message_id),
             headears=_reason(reason)
         )
 
@@ -316,7 +315,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/pins/{message_id}', 'DELETE'),
+            Route('/channels/{channel_id}/pins/{message_id}', 'DELETE', channel_id=channel_id, message_id=message_id),
             headears=_reason(reason)
         )
 
@@ -326,7 +325,7 @@ class APIClient:
         limit: int=100
     ) -> typing.List["Webhook"]:
         r = await self.client.http.request(
-            Route(f'/channels/{channel_id}/webhooks', 'GET'),
+            Route('/channels/{channel_id}/webhooks', 'GET', channel_id=channel_id),
             params={'limit': limit}
         )
         return [Webhook(self.client, w) for w in r]
@@ -339,7 +338,7 @@ class APIClient:
         reason: str=None
     ) -> "Webhook":
         r = await self.client.http.request(
-            Route(f'/channels/{channel_id}/webhooks', 'POST'),
+            Route('/channels/{channel_id}/webhooks', 'POST', channel_id=channel_id),
             json={
                 'name': name,
                 'avatar': avatar,
@@ -355,7 +354,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/channels/{channel_id}/webhooks/{webhook_id}', 'DELETE'),
+            Route('/channels/{channel_id}/webhooks/{webhook_id}', 'DELETE', channel_id=channel_id, webhook_id=webhook_id),
             headears=_reason(reason)
         )
 
@@ -365,7 +364,7 @@ class APIClient:
         webhook_id: int
     ) -> "Webhook":
         r = await self.client.http.request(
-            Route(f'/channels/{channel_id}/webhooks/{webhook_id}', 'GET')
+            Route('/channels/{channel_id}/webhooks/{webhook_id}', 'GET', channel_id=channel_id, webhook_id=webhook_id)
         )
         return Webhook(self.client, r)
     
@@ -374,7 +373,7 @@ class APIClient:
         guild_id: int
     ) -> "Guild":
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}', 'GET')
+            Route('/guilds/{guild_id}', 'GET', guild_id=guild_id)
         )
         return Guild(self.client, r)
 
@@ -393,7 +392,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}', 'PATCH'),
+            Route('/guilds/{guild_id}', 'PATCH', guild_id=guild_id),
             json={
                 'name': name,
                 'region': region,
@@ -414,7 +413,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}', 'DELETE'),
+            Route('/guilds/{guild_id}', 'DELETE', guild_id=guild_id),
             headears=_reason(reason)
         )
 
@@ -424,7 +423,7 @@ class APIClient:
         limit: int=100
     ) -> typing.List["ChannelsTypes"]:
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/channels', 'GET'),
+            Route('/guilds/{guild_id}/channels', 'GET', guild_id=guild_id),
             params={'limit': limit}
         )
         return [deserialize_channel(self.client, c) for c in r]
@@ -443,7 +442,7 @@ class APIClient:
         reason: str = None
     ) -> "ChannelsTypes":
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/channels', 'POST'),
+            Route('/guilds/{guild_id}/channels', 'POST', guild_id=guild_id),
             json={
                 'name': name,
                 'type': type,
@@ -469,7 +468,7 @@ class APIClient:
         reason: str=None
     ) -> "Role":
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/roles', 'POST'),
+            Route('/guilds/{guild_id}/roles', 'POST', guild_id=guild_id),
             json={
                 'name': name,
                 'permissions': permissions,
@@ -486,7 +485,7 @@ class APIClient:
         guild_id: int
     ) -> typing.List["Role"]:
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/roles', 'GET')
+            Route('/guilds/{guild_id}/roles', 'GET', guild_id=guild_id)
         )
         return [Role(self.client, r) for r in r]
 
@@ -502,7 +501,7 @@ class APIClient:
         reason: str=None
     ) -> "Role":
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}/roles/{role_id}', 'PATCH'),
+            Route('/guilds/{guild_id}/roles/{role_id}', 'PATCH', guild_id=guild_id, role_id=role_id),
             json={
                 'name': name,
                 'permissions': permissions,
@@ -521,7 +520,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}/roles/{role_id}', 'DELETE'),
+            Route('/guilds/{guild_id}/roles/{role_id}', 'DELETE', guild_id=guild_id, role_id=role_id),
             headears=_reason(reason)
         )
 
@@ -532,7 +531,7 @@ class APIClient:
         reason: str=None
     ) -> int:
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/prune', 'POST'),
+            Route('/guilds/{guild_id}/prune', 'POST', guild_id=guild_id),
             json={
                 'days': days,
             },
@@ -547,7 +546,7 @@ class APIClient:
         after: int=None
     ) -> typing.List["Member"]:
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/members', 'GET'),
+            Route('/guilds/{guild_id}/members', 'GET', guild_id=guild_id),
             params={
                 'limit': limit,
                 'after': after
@@ -564,7 +563,7 @@ class APIClient:
         reason: str=None
     ) -> "Member":
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/members/{user_id}', 'PATCH'),
+            Route('/guilds/{guild_id}/members/{user_id}', 'PATCH', guild_id=guild_id, user_id=user_id),
             json={
                 'nick': nick,
                 'roles': roles,
@@ -581,7 +580,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}/members/{user_id}/roles/{role_id}', 'PUT'),
+            Route('/guilds/{guild_id}/members/{user_id}/roles/{role_id}', 'PUT', guild_id=guild_id, user_id=user_id, role_id=role_id),
             headears=_reason(reason)
         )
 
@@ -593,7 +592,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}/members/{user_id}/roles/{role_id}', 'DELETE'),
+            Route('/guilds/{guild_id}/members/{user_id}/roles/{role_id}', 'DELETE', guild_id=guild_id, user_id=user_id, role_id=role_id),
             headears=_reason(reason)
         )
 
@@ -604,7 +603,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}/members/{user_id}', 'DELETE'),
+            Route('/guilds/{guild_id}/members/{user_id}', 'DELETE', guild_id=guild_id, user_id=user_id),
             headears=_reason(reason)
         )
 
@@ -616,7 +615,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}/bans/{user_id}', 'PUT'),
+            Route('/guilds/{guild_id}/bans/{user_id}', 'PUT', guild_id=guild_id, user_id=user_id),
             json={
                 'delete-message-days': delete_message_days,
             },
@@ -630,7 +629,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}/bans/{user_id}', 'DELETE'),
+            Route('/guilds/{guild_id}/bans/{user_id}', 'DELETE', guild_id=guild_id, user_id=user_id),
             headears=_reason(reason)
         )
 
@@ -644,7 +643,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}/members/{user_id}', 'PATCH'),
+            Route('/guilds/{guild_id}/members/{user_id}', 'PATCH', guild_id=guild_id, user_id=user_id),
             json={
                 'channel_id': channel_id,
                 'mute': mute,
@@ -658,7 +657,7 @@ class APIClient:
         guild_id: int
     ) -> typing.List[tuple]:
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/bans', 'GET')
+            Route('/guilds/{guild_id}/bans', 'GET', guild_id=guild_id)
         )
         return [(User(b['user']),b['reason']) for b in r]
 
@@ -667,7 +666,7 @@ class APIClient:
         guild_id: int
     ) -> typing.List["Invite"]:
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/invites', 'GET')
+            Route('/guilds/{guild_id}/invites', 'GET', guild_id=guild_id)
         )
         return [Invite(self.client, i) for i in r]
 
@@ -676,7 +675,7 @@ class APIClient:
         guild_id: int
     ) -> typing.List["Webhook"]:
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/webhooks', 'GET')
+            Route('/guilds/{guild_id}/webhooks', 'GET', guild_id=guild_id)
         )
         return [Webhook(self.client, w) for w in r]
 
@@ -685,7 +684,7 @@ class APIClient:
         guild_id: int
     ) -> typing.List["Emoji"]:
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/emojis', 'GET')
+            Route('/guilds/{guild_id}/emojis', 'GET', guild_id=guild_id)
         )
         return [Emoji(self.client, e) for e in r]
 
@@ -697,7 +696,7 @@ class APIClient:
         reason: str=None
     ) -> "Emoji":
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/emojis', 'POST'),
+            Route('/guilds/{guild_id}/emojis', 'POST', guild_id=guild_id),
             json={
                 'name': name,
                 'image': image,
@@ -713,7 +712,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}/emojis/{emoji_id}', 'DELETE'),
+            Route('/guilds/{guild_id}/emojis/{emoji_id}', 'DELETE', guild_id=guild_id, emoji_id=emoji_id),
             headears=_reason(reason)
         )
         
@@ -725,7 +724,7 @@ class APIClient:
         reason: str=None
     ) -> "Emoji":
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/emojis/{emoji_id}', 'PATCH'),
+            Route('/guilds/{guild_id}/emojis/{emoji_id}', 'PATCH', guild_id=guild_id, emoji_id=emoji_id),
             json={
                 'name': name,
             },
@@ -738,7 +737,7 @@ class APIClient:
         guild_id: int
     ) -> typing.List["Sticker"]:
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/stickers', 'GET')
+            Route('/guilds/{guild_id}/stickers', 'GET', guild_id=guild_id)
         )
         return [Sticker(self.client, s) for s in r]
 
@@ -750,7 +749,7 @@ class APIClient:
         reason: str=None
     ) -> "Sticker":
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/stickers', 'POST'),
+            Route('/guilds/{guild_id}/stickers', 'POST', guild_id=guild_id),
             json={
                 'name': name,
                 'image': image,
@@ -766,7 +765,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}/stickers/{sticker_id}', 'DELETE'),
+            Route('/guilds/{guild_id}/stickers/{sticker_id}', 'DELETE', guild_id=guild_id, sticker_id=sticker_id),
             headears=_reason(reason)
         )
     
@@ -778,7 +777,7 @@ class APIClient:
         reason: str=None
     ) -> "Sticker":
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/stickers/{sticker_id}', 'PATCH'),
+            Route('/guilds/{guild_id}/stickers/{sticker_id}', 'PATCH', guild_id=guild_id, sticker_id=sticker_id),
             json={
                 'name': name,
             },
@@ -794,7 +793,7 @@ class APIClient:
     #     after: int=None
     # ) -> typing.List["AuditLogEntry"]:
     #     r = await self.client.http.request(
-    #         Route(f'/guilds/{guild_id}/audit-logs', 'GET'),
+    #         Route('/guilds/{guild_id}/audit-logs', 'GET', guild_id=guild_id),
     #         params={
     #             'limit': limit,
     #             'before': before,
@@ -831,7 +830,7 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/users/@me/guilds/{guild_id}', 'DELETE'),
+            Route('/users/@me/guilds/{guild_id}', 'DELETE', guild_id=guild_id),
             headears=_reason(reason)
         )
     
@@ -859,7 +858,7 @@ class APIClient:
         guild_id: int
     ) -> typing.List["Invite"]:
         r = await self.client.http.request(
-            Route(f'/guilds/{guild_id}/invites', 'GET')
+            Route('/guilds/{guild_id}/invites', 'GET', guild_id=guild_id)
         )
         return [Invite(self.client, i) for i in r]
 
@@ -870,6 +869,6 @@ class APIClient:
         reason: str=None
     ) -> None:
         await self.client.http.request(
-            Route(f'/guilds/{guild_id}/invites/{code}', 'DELETE'),
+            Route('/guilds/{guild_id}/invites/{code}', 'DELETE', guild_id=guild_id, code=code),
             headears=_reason(reason)
         )
\ No newline at end of file
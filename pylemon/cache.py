@@ -3,121 +3,494 @@ r"""
     :license: MIT, see LICENSE for more details.
 """
 
+import copy
 import typing
 
 if typing.TYPE_CHECKING:
     from pylemon.client import BaseClient
 
 from pylemon.types import *
+from pylemon.intents import Intents
 
 from rich import print
 
+MEMBER_CACHE_POLICIES: typing.Tuple[str, ...] = ('everyone', 'online', 'voice', 'none')
+
+class CachePolicy:
+    """
+        What the gateway cache keeps. It is combined with the intents of the client by `with_intents`,
+        the data of events the intents don't subscribe to is not kept since it could only go stale.
+        Only the cache handlers of the kept data are registered, so the events of the rest are
+        dropped by the gateway, and the guilds only build the collections that are kept.
+
+        Parameters
+        ----------
+        messages: int
+            The number of messages kept, no limit if None and no messages are kept if 0.
+        members: str
+            Which members are kept, `everyone`, `online`, `voice` or `none`, the `member_cache` option of the client.
+        channels: bool
+            Whether the channels are kept.
+        threads: bool
+            Whether the threads are kept.
+        roles: bool
+            Whether the roles are kept.
+        emojis: bool
+            Whether the emojis are kept.
+        stickers: bool
+            Whether the stickers are kept.
+        voice_states: bool
+            Whether the voice states are kept, they are always kept for the `voice` members policy.
+    """
+    # The intents the events of some data come with, one of them is enough.
+    INTENTS: typing.Dict[str, int] = {
+        'messages': Intents.GUILD_MESSAGES | Intents.DIRECT_MESSAGES,
+        'channels': Intents.GUILDS,
+        'threads': Intents.GUILDS,
+        'roles': Intents.GUILDS,
+        'emojis': Intents.GUILD_EMOJIS_AND_STICKERS,
+        'stickers': Intents.GUILD_EMOJIS_AND_STICKERS,
+        'voice_states': Intents.GUILD_VOICE_STATES,
+    }
+    MEMBER_INTENTS: typing.Dict[str, int] = {
+        'everyone': Intents.GUILD_MEMBERS,
+        'online': Intents.GUILD_PRESENCES,
+        'voice': Intents.GUILD_VOICE_STATES,
+    }
+
+    def __init__(
+        self,
+        messages: typing.Optional[int] = 1000,
+        members: str = 'everyone',
+        channels: bool = True,
+        threads: bool = True,
+        roles: bool = True,
+        emojis: bool = True,
+        stickers: bool = True,
+        voice_states: bool = True,
+    ) -> None:
+        if members not in MEMBER_CACHE_POLICIES:
+            raise ValueError(f"members must be one of {', '.join(MEMBER_CACHE_POLICIES)}")
+        self.messages = messages
+        self.members = members
+        self.channels = channels
+        self.threads = threads
+        self.roles = roles
+        self.emojis = emojis
+        self.stickers = stickers
+        self.voice_states = voice_states or members == 'voice'
+
+    def with_intents(self, intents: int) -> "CachePolicy":
+        """
+            Gets the policy without the data the intents don't subscribe to.
+
+            Parameters
+            ----------
+            intents: int
+                The intents of the client.
+        """
+        kept = {
+            name: getattr(self, name) if intents & intent else (0 if name == 'messages' else False)
+            for name, intent in self.INTENTS.items()
+        }
+        members = self.members
+        if members in self.MEMBER_INTENTS and not intents & self.MEMBER_INTENTS[members]:
+            members = 'none'
+        return CachePolicy(members=members, **kept)
+
+    def keeps(self, name: str) -> bool:
+        """
+            Whether some data is kept.
+
+            Parameters
+            ----------
+            name: str
+                The name of the data, like `messages` or `emojis`.
+        """
+        value = getattr(self, name)
+        if name == 'members':
+            return value != 'none'
+        return value is None or bool(value)
+
+    def __repr__(self) -> str:
+        return f'<CachePolicy messages={self.messages} members={self.members!r}>'
+
+def remove(items: typing.List[typing.Any], item: typing.Any) -> None:
+    """
+        Removes an object from a list by identity, the models compare equal to each other so `list.remove` can't be used.
+    """
+    for index, cached in enumerate(items):
+        if cached is item:
+            del items[index]
+            return
+
 class GatewayCache:
+    # The data every handler keeps, a handler is only registered when the cache policy keeps some of it.
+    # `responses` is the rest response cache, the handlers drop its stale responses. Handlers that are
+    # not listed are always registered.
+    KEEPS: typing.Dict[str, typing.Tuple[str, ...]] = {
+        'on_message_create': ('messages',),
+        'on_message_delete': ('messages',),
+        'on_message_update': ('messages',),
+        'on_message_reaction_add': ('messages',),
+        'on_message_reaction_remove': ('messages',),
+        'on_guild_role_create': ('roles', 'responses'),
+        'on_guild_role_delete': ('roles', 'responses'),
+        'on_guild_role_update': ('roles', 'responses'),
+        'on_channel_create': ('channels',),
+        'on_channel_delete': ('channels', 'responses'),
+        'on_channel_update': ('channels', 'responses'),
+        'on_guild_member_add': ('members',),
+        'on_guild_member_remove': ('members',),
+        'on_guild_member_update': ('members',),
+        'on_guild_members_chunk': ('members',),
+        'on_voice_state_update': ('voice_states',),
+        'on_guild_emojis_update': ('emojis', 'responses'),
+        'on_guild_stickers_update': ('stickers', 'responses'),
+        'on_webhooks_update': ('responses',),
+        'on_invite_create': ('responses',),
+        'on_invite_delete': ('responses',),
+    }
+
     def __init__(
         self,
         client: "BaseClient",
     ) -> None:
         self.client = client
+        # The number of cached members holding every cached user, by user id.
+        self.user_refs: typing.Dict[int, int] = {}
 
     def __call__(self):
         for method in dir(self):
-            if method.startswith("on_"):
-                self.client.add_event(method[3:], getattr(self, method))
+            if method.startswith("on_") and self.needed(method):
+                self.client.add_event(method[3:], getattr(self, method), ordered=True)
+
+    def needed(self, method: str) -> bool:
+        """
+            Whether a handler keeps any data of the cache policy.
+
+            Parameters
+            ----------
+            method: str
+                The name of the handler.
+        """
+        keeps = self.KEEPS.get(method)
+        if keeps is None:
+            return True
+        return any(
+            self.client.http.cache is not None if name == 'responses' else self.client.cache_policy.keeps(name)
+            for name in keeps
+        )
+
+    def invalidate(self, path: str, **params) -> None:
+        """
+            Drops the cached rest responses of a resource that changed, when the response cache is enabled.
+
+            Parameters
+            ----------
+            path: str
+                The path template of the resource.
+            params:
+                The major parameters of the resource.
+        """
+        if self.client.http.cache is not None:
+            self.client.http.cache.invalidate(path, **params)
+
+    def share_user(self, user: "User") -> "User":
+        """
+            Gets the cached user with the id of a user, or the user itself when it isn't cached.
+            A newer user updates the cached one in place, so every member keeps sharing it.
+
+            Parameters
+            ----------
+            user: User
+                The user.
+        """
+        cached = self.client.user_store.get(user.id)
+        if cached is None:
+            return user
+        if cached is not user:
+            vars(cached).update(vars(user))
+        return cached
+
+    def hold_user(self, user: "User") -> "User":
+        """
+            Shares the user of a cached member and counts the member, the user is cached
+            for as long as a cached member holds it.
+
+            Parameters
+            ----------
+            user: User
+                The user.
+        """
+        user = self.share_user(user)
+        refs = self.user_refs.get(user.id, 0)
+        if refs == 0:
+            self.client.user_store.add(user)
+        self.user_refs[user.id] = refs + 1
+        return user
+
+    def release_user(self, id: int) -> None:
+        """
+            Uncounts a member that is no longer cached, its user is removed with the last one.
+
+            Parameters
+            ----------
+            id: int
+                The id of the user.
+        """
+        refs = self.user_refs.pop(id, 0) - 1
+        if refs > 0:
+            self.user_refs[id] = refs
+        elif self.client.user is None or id != self.client.user.id:
+            self.client.user_store.remove(id)
+
+    def add_member(self, guild: "Guild", member: "Member") -> None:
+        """
+            Adds a member to the store of its guild, sharing its user.
+
+            Parameters
+            ----------
+            guild: Guild
+                The guild.
+            member: Member
+                The member.
+        """
+        if member.id in guild.member_store:
+            member.user = self.share_user(member.user)
+        else:
+            member.user = self.hold_user(member.user)
+        guild.member_store.add(member)
+
+    def remove_member(self, guild: "Guild", id: int) -> None:
+        """
+            Removes a member from the store of its guild, and its user when no other guild holds it.
+
+            Parameters
+            ----------
+            guild: Guild
+                The guild.
+            id: int
+                The id of the member.
+        """
+        if guild.member_store.remove(id) is not None:
+            self.release_user(int(id))
+
+    async def request_members(self, guild: "Guild") -> None:
+        """
+            Asks for the members of a large guild that were not sent with it, when `chunk_guilds` is enabled.
+            The `everyone` policy gets every member and the `online` one gets them with their presences.
+
+            Parameters
+            ----------
+            guild: Guild
+                The guild.
+        """
+        policy = self.client.cache_policy.members
+        if not self.client.chunk_guilds or not guild.large or policy not in ('everyone', 'online'):
+            return
+        if len(guild.member_store) >= (guild.member_count or 0):
+            return
+        shard = self.client.get_shard(guild.id)
+        if shard is not None:
+            await shard.request_members(guild.id, presences=policy == 'online')
+
+    def remove_guild(self, guild: "Guild") -> None:
+        """
+            Removes a guild and its channels, threads, emojis and stickers from the cache,
+            and the users only its members held.
+
+            Parameters
+            ----------
+            guild: Guild
+                The guild.
+        """
+        self.client.guild_store.remove(guild.id)
+        # The client stores hold the same objects as the stores of the guild.
+        for channel in guild.channel_store:
+            self.client.channel_store.remove(channel.id)
+        for thread in guild.thread_store:
+            self.client.thread_store.remove(thread.id)
+        for emoji in guild.emoji_store:
+            self.client.emoji_store.remove(emoji.id)
+        for sticker in guild.sticker_store:
+            self.client.sticker_store.remove(sticker.id)
+        for member in guild.member_store:
+            self.release_user(member.id)
 
     async def on_guild_create(self, guild: "Guild") -> None:
+        # A guild is sent again after a new session, it replaces the cached one instead of being added twice.
+        cached = self.client.get_guild(guild.id)
+        if cached is not None:
+            self.remove_guild(cached)
+
         for channel in guild.channels:
-            self.client.channels.append(channel)
+            self.client.channel_store.add(channel)
         for thread in guild.threads:
-            self.client.threads.append(thread)
-        for user in guild.users:
-            self.client.users.append(user)
+            self.client.thread_store.add(thread)
+        for member in guild.member_store:
+            member.user = self.hold_user(member.user)
         for emoji in guild.emojis:
-            self.client.emojis.append(emoji)
+            self.client.emoji_store.add(emoji)
         for sticker in guild.stickers:
-            self.client.stickers.append(sticker)
+            self.client.sticker_store.add(sticker)
+
+        self.client.guild_store.add(guild)
+        await self.request_members(guild)
+
+    async def on_guild_update(self, before: "Guild", after: "Guild") -> None:
+        # The update has no channels, members or voice states, they are kept from the cached guild.
+        if before is None:
+            return
+        after.channel_store, after.channels = before.channel_store, before.channels
+        after.thread_store, after.threads = before.thread_store, before.threads
+        after.member_store, after.members = before.member_store, before.members
+        after.voicestates = before.voicestates
+        self.client.guild_store.add(after)
 
-        self.client.guilds.append(guild)
+    async def on_guild_delete(self, guild: "Guild") -> None:
+        if guild is not None:
+            self.remove_guild(guild)
 
     async def on_message_create(self, message: "Message") -> None:
-        self.client.messages.append(message)
+        self.client.message_store.add(message)
     
     async def on_message_delete(self, message: "Message") -> None:
-        self.client.messages.remove(message)
+        if message is not None:
+            self.client.message_store.remove(message.id)
 
     async def on_message_update(self, before: "Message", after: "Message") -> None:
-        self.client.messages.remove(before)
-        self.client.messages.append(after)
+        self.client.message_store.add(after)
     
     async def on_guild_role_create(self, guild: "Guild",role: "Role") -> None:
-        guild.roles.append(role)
+        self.invalidate('/guilds/{guild_id}/roles', guild_id=role.guild_id)
+        if guild is not None and self.client.cache_policy.roles:
+            guild.role_store.add(role)
 
     async def on_guild_role_delete(self, guild: "Guild",role: "Role") -> None:
-        guild.roles.remove(role)
+        if guild is None:
+            return
+        self.invalidate('/guilds/{guild_id}/roles', guild_id=guild.id)
+        if role is not None:
+            guild.role_store.remove(role.id)
 
     async def on_guild_role_update(self, guild: "Guild",before: "Role",after: "Role") -> None:
-        guild.roles.remove(before)
-        guild.roles.append(after)
+        self.invalidate('/guilds/{guild_id}/roles', guild_id=after.guild_id)
+        if guild is not None and self.client.cache_policy.roles:
+            guild.role_store.add(after)
 
     async def on_channel_create(self, channel: "ChannelsTypes") -> None:
-        self.client.channels.append(channel)
+        self.client.channel_store.add(channel)
+        guild = self.client.get_guild(getattr(channel, 'guild_id', None))
+        if guild is not None:
+            guild.channel_store.add(channel)
 
     async def on_channel_delete(self, channel: "ChannelsTypes") -> None:
-        self.client.channels.remove(channel)
+        self.invalidate('/channels/{channel_id}/webhooks', channel_id=channel.id)
+        self.invalidate('/channels/{channel_id}/invites', channel_id=channel.id)
+        self.client.channel_store.remove(channel.id)
+        guild = self.client.get_guild(getattr(channel, 'guild_id', None))
+        if guild is not None:
+            guild.channel_store.remove(channel.id)
     
     async def on_channel_update(self, before: "ChannelsTypes", after: "ChannelsTypes") -> None:
-        self.client.channels.remove(before)
-        self.client.channels.append(after)
+        self.invalidate('/channels/{channel_id}/webhooks', channel_id=after.id)
+        self.invalidate('/channels/{channel_id}/invites', channel_id=after.id)
+        if self.client.cache_policy.channels:
+            await self.on_channel_create(after)
         
     async def on_guild_member_add(self,guild: "Guild", member: "Member") -> None:
-        self.client.users.append(User(self.client, vars(member)))
-        guild.members.append(member)
+        if guild is not None and self.client.cache_policy.members == 'everyone':
+            self.add_member(guild, member)
 
     async def on_guild_member_remove(self, guild: "Guild", member: "Member") -> None:
-        self.client.users.remove([user for user in self.client.users if user.id == member.id][0])
-        guild.members.remove(member)
+        if guild is None or member is None:
+            return
+        self.remove_member(guild, member.id)
     
     async def on_guild_member_update(self, guild: "Guild", before: "Member", after: "Member") -> None:
-        guild.members.remove(before)
-        guild.members.append(after)
-    
-    async def on_guild_update(self, guild: "Guild", before: "Guild", after: "Guild") -> None:
-        ... 
+        if before is not None:
+            # The cached user is updated in place, `before` keeps a copy of it with the old fields.
+            before.user = copy.copy(before.user)
+        if guild is not None and (before is not None or self.client.cache_policy.members == 'everyone'):
+            self.add_member(guild, after)
+        else:
+            after.user = self.share_user(after.user)
+
+    async def on_guild_members_chunk(self, guild: "Guild", members: typing.List["Member"]) -> None:
+        if guild is None:
+            return
+        for member in members:
+            self.add_member(guild, member)
+
+    async def on_voice_state_update(self, guild: "Guild", state: "VoiceState") -> None:
+        if guild is None:
+            return
+        for cached in guild.voicestates:
+            if cached.user_id == state.user_id:
+                remove(guild.voicestates, cached)
+                break
+        if state.channel_id is not None:
+            guild.voicestates.append(state)
+
+        if self.client.cache_policy.members != 'voice' or (self.client.user and state.user_id == self.client.user.id):
+            return
+        if state.channel_id is None:
+            self.remove_member(guild, state.user_id)
+        elif state.member is not None:
+            self.add_member(guild, state.member)
 
     async def on_message_reaction_add(self, message: "Message", reaction: "Reaction") -> None:
-        message.reactions.append(reaction)
+        if message is not None:
+            message.reactions.append(reaction)
 
     async def on_message_reaction_remove(self, message: "Message", reaction: "Reaction") -> None:
-        message.reactions.remove([_reaction for _reaction in message.reactions if _reaction.emoji == reaction.emoji][0])
+        if message is None:
+            return
+        for _reaction in message.reactions:
+            if _reaction.emoji == reaction.emoji:
+                remove(message.reactions, _reaction)
+                break
 
     async def on_guild_emojis_update(self, guild: "Guild", emojis: typing.List["Emoji"]) -> None:
+        if guild is None:
+            return
+        self.invalidate('/guilds/{guild_id}/emojis', guild_id=guild.id)
+        if not self.client.cache_policy.emojis:
+            return
+        for emoji in guild.emoji_store:
+            self.client.emoji_store.remove(emoji.id)
+        guild.emoji_store.clear()
         for emoji in emojis:
-            for emoji in guild.emojis:
-                if emoji.id == emoji.id:
-                    guild.emojis.remove(emoji)
-                    self.client.emojis.remove(emoji)
-            guild.emojis.append(emoji)
-            self.client.emojis.append(emoji)
+            self.client.emoji_store.add(emoji)
+            guild.emoji_store.add(emoji)
     
     async def on_guild_stickers_update(self, guild: "Guild", stickers: typing.List["Sticker"]) -> None:
+        if guild is None:
+            return
+        self.invalidate('/guilds/{guild_id}/stickers', guild_id=guild.id)
+        if not self.client.cache_policy.stickers:
+            return
+        for sticker in guild.sticker_store:
+            self.client.sticker_store.remove(sticker.id)
+        guild.sticker_store.clear()
         for sticker in stickers:
-            for sticker in guild.stickers:
-                if sticker.id == sticker.id:
-                    guild.stickers.remove(sticker)
-                    self.client.stickers.remove(sticker)
-            guild.stickers.append(sticker)
-            self.client.stickers.append(sticker)
+            self.client.sticker_store.add(sticker)
+            guild.sticker_store.add(sticker)
     
+    async def on_webhooks_update(self, data: typing.Dict[str, typing.Any]) -> None:
+        self.invalidate('/channels/{channel_id}/webhooks', channel_id=int(data['channel_id']))
+
+    async def on_invite_create(self, data: typing.Dict[str, typing.Any]) -> None:
+        self.invalidate('/channels/{channel_id}/invites', channel_id=int(data['channel_id']))
+
+    async def on_invite_delete(self, data: typing.Dict[str, typing.Any]) -> None:
+        self.invalidate('/channels/{channel_id}/invites', channel_id=int(data['channel_id']))
+
     async def on_voice_server_update(self, guild: "Guild", voice_server: "VoiceServer") -> None:
+        if guild is None:
+            return
         if voice_server.endpoint:
             guild.voice_server = voice_server
         else:
             guild.voice_server = None
-            
-    
-    
-
-    
-    
-
-
-    
\ No newline at end of file
@@ -9,12 +9,19 @@ import asyncio
 if typing.TYPE_CHECKING:
     from pylemon.plugin import Plugin
     from pylemon.intents import Intents
+    from pylemon.ratelimit import RateLimitBackend
+    from pylemon.http import RetryPolicy, ResponseCache
+    from pylemon.codec import JSONCodec
 
 from pylemon.emitter import Emitter
 from pylemon.gateway import Gateway
+from pylemon.shard import ShardManager
+from pylemon.cluster import ClusterBus, ClusterManager
 from pylemon.http import HTTP
 from pylemon.api import APIClient
 from pylemon.logger import logger
+from pylemon.codec import get_codec
+from pylemon.store import Store, StoreView, MessageStore
 
 from pylemon.types import (
     Guild,
@@ -32,12 +39,19 @@ from pylemon.types import (
     User,
 )
 
-from pylemon.cache import GatewayCache
+from pylemon.cache import GatewayCache, CachePolicy
 
 class BaseClient(Emitter):
     """
         The minmal required class for a client class.
         This help us to inherit from this class and implemnent the required methods and tools.
+
+        Parameters
+        ----------
+        encoding: str
+            The gateway payload encoding, `json` or `etf`. The built-in etf decoder is pure python
+            and decodes about 5 times slower than json, so `json` with a fast codec is the faster choice,
+            `etf` only makes the payloads smaller.
     """
     def __init__(
         self,
@@ -49,6 +63,28 @@ class BaseClient(Emitter):
         cache_client: object = GatewayCache,
         loop: typing.Optional[asyncio.AbstractEventLoop] = None,
         activity: typing.Optional[str] = None,
+        global_rate_limit: typing.Optional[int] = None,
+        ratelimiter: typing.Optional["RateLimitBackend"] = None,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        retry_policy: typing.Optional["RetryPolicy"] = None,
+        response_cache: typing.Optional["ResponseCache"] = None,
+        codec: typing.Union[str, "JSONCodec", None] = None,
+        encoding: str = 'json',
+        compress: str = 'zlib-stream',
+        shard_count: typing.Optional[int] = None,
+        shard_ids: typing.Optional[typing.List[int]] = None,
+        concurrent_handlers: bool = False,
+        handler_concurrency: int = 100,
+        handler_timeout: typing.Optional[float] = None,
+        max_messages: typing.Optional[int] = 1000,
+        messages_per_channel: typing.Optional[int] = None,
+        message_ttl: typing.Optional[float] = None,
+        member_cache: str = 'everyone',
+        chunk_guilds: bool = False,
+        cache_policy: typing.Optional["CachePolicy"] = None,
     ) -> None:
         self.token = f'Bot {token}' if bot == True else token
         self.intents = sum(intents) if type(intents) == list else intents
@@ -57,24 +93,56 @@ class BaseClient(Emitter):
         self.cache_client = cache_client
         self.loop = loop or asyncio.get_event_loop() or asyncio.new_event_loop() ; asyncio.set_event_loop(self.loop)
         self.activity = activity
-
-        self.gateway = Gateway(self)
-        self.http = HTTP(self)
+        self.codec = get_codec(codec)
+        self.encoding = encoding
+        self.compress = compress
+        if cache_policy is None:
+            cache_policy = CachePolicy(messages=max_messages, members=member_cache)
+        self.cache_policy: CachePolicy = cache_policy.with_intents(self.intents)
+        self.chunk_guilds = chunk_guilds
+
+        self.shards = ShardManager(self, shard_count, shard_ids)
+        self.cluster: typing.Optional[ClusterBus] = None
+        self.http = HTTP(
+            self,
+            global_rate_limit=global_rate_limit,
+            ratelimiter=ratelimiter,
+            retry_policy=retry_policy,
+            connection_limit=connection_limit,
+            connection_limit_per_host=connection_limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            dns_cache_ttl=dns_cache_ttl,
+            cache=response_cache,
+        )
         self.api = APIClient(self)
         self.log = logger(self.debug)
+        if self.encoding == 'etf':
+            self.log.warning("The etf encoding decodes slower than json, it only makes the gateway payloads smaller")
 
         self.user: User = None 
+        self.unavailable_guilds: typing.List[int] = []
 
         self.voice_states: typing.List["VoiceState"] = []
-        self.guilds: typing.List["Guild"] = []
-        self.channels: typing.List["ChannelsTypes"] = []
-        self.messages: typing.List["Message"] = []
-        self.emojis: typing.List["Emoji"] = []
-        self.users: typing.List["User"] = []
-        self.stickers: typing.List["Sticker"] = []
-        self.threads: typing.List["TextChannel"] = []
+        self.guild_store: Store["Guild"] = Store()
+        self.channel_store: Store["ChannelsTypes"] = Store()
+        self.message_store: MessageStore["Message"] = MessageStore(self.cache_policy.messages, messages_per_channel, message_ttl)
+        self.emoji_store: Store["Emoji"] = Store()
+        self.user_store: Store["User"] = Store()
+        self.sticker_store: Store["Sticker"] = Store()
+        self.thread_store: Store["TextChannel"] = Store()
+
+        self.guilds: StoreView["Guild"] = self.guild_store.view()
+        self.channels: StoreView["ChannelsTypes"] = self.channel_store.view()
+        self.messages: StoreView["Message"] = self.message_store.view()
+        self.emojis: StoreView["Emoji"] = self.emoji_store.view()
+        self.users: StoreView["User"] = self.user_store.view()
+        self.stickers: StoreView["Sticker"] = self.sticker_store.view()
+        self.threads: StoreView["TextChannel"] = self.thread_store.view()
 
         super().__init__(self)
+        self.concurrent = concurrent_handlers
+        self.concurrency = handler_concurrency
+        self.timeout = handler_timeout
         self.cache_client(self)()
 
 
@@ -98,6 +166,41 @@ class BaseClient(Emitter):
         """
         return self.add_event(func.__name__[3:], func)
 
+    @property
+    def gateway(self) -> typing.Optional[Gateway]:
+        """
+            The gateway of the first shard, the only one when the client isn't sharded.
+        """
+        if self.shards.shards:
+            return self.shards.shards[min(self.shards.shards)]
+
+    @property
+    def latency(self) -> typing.Optional[float]:
+        """
+            The average heartbeat latency of the shards in seconds, None before the first heartbeat.
+        """
+        latencies = [latency for latency in self.shards.latencies.values() if latency is not None]
+        if latencies:
+            return sum(latencies) / len(latencies)
+
+    @property
+    def latencies(self) -> typing.Dict[int, typing.Optional[float]]:
+        """
+            The heartbeat latency of every shard in seconds.
+        """
+        return self.shards.latencies
+
+    def get_shard(self, guild_id: int) -> typing.Optional[Gateway]:
+        """
+            Gets the gateway of the shard a guild is on.
+
+            Parameters
+            ----------
+            guild_id: int
+                The id of the guild.
+        """
+        return self.shards.get_shard(guild_id)
+
     def get_guild(self, id: int) -> "Guild":
         """
             Gets a guild by id.
@@ -107,9 +210,7 @@ class BaseClient(Emitter):
             id: int
                 The id of the guild.
         """
-        for guild in self.guilds:
-            if guild.id == int(id):
-                return guild
+        return self.guild_store.get(id)
 
     def get_user(self, id: int) -> "User":
         """
@@ -120,9 +221,7 @@ class BaseClient(Emitter):
             id: int
                 The id of the user.
         """
-        for user in self.users:
-            if user.id == str(id):
-                return user
+        return self.user_store.get(id)
 
     def get_channel(self, id: int) -> "ChannelsTypes":
         """
@@ -133,9 +232,7 @@ class BaseClient(Emitter):
             id: int
                 The id of the channel.
         """
-        for channel in self.channels:
-            if channel.id == int(id):
-                return channel
+        return self.channel_store.get(id)
 
     def get_message(self, id: int) -> "Message":
         """
@@ -146,9 +243,7 @@ class BaseClient(Emitter):
             id: int
                 The id of the message.
         """
-        for message in self.messages:
-            if message.id == int(id):
-                return message
+        return self.message_store.get(id)
 
     def get_emoji(self, id: int) -> "Emoji":
         """
@@ -159,10 +254,7 @@ class BaseClient(Emitter):
             id: int
                 The id of the emoji
         """
-
-        for emoji in self.emojis:
-            if emoji.id == str(id):
-                return emoji
+        return self.emoji_store.get(id)
 
     def add_plugin(self, plugin: "Plugin") -> None:
         """
@@ -175,11 +267,17 @@ class BaseClient(Emitter):
         """
         plugin.client = self
 
-        for key,value in plugin.emitter.events:
-            self.add_event(key, value)
+        for event, callbacks in plugin.emitter.events.items():
+            for callback in callbacks:
+                self.add_event(event, callback)
 
 
-    def connect(self, reconnect: bool=True) -> None:
+    def connect(
+        self,
+        reconnect: bool=True,
+        clusters: typing.Optional[int]=None,
+        forward_events: typing.Optional[typing.List[str]]=None,
+    ) -> None:
         """
             Connects to the gateway.
             This method is a coroutine.
@@ -188,13 +286,31 @@ class BaseClient(Emitter):
             ----------
             reconnect: bool
                 Whether to reconnect to the gateway or not.
-            chaced: bool
-                Whether to load the cache or not.
+            clusters: int
+                Runs the shards in this many processes instead of this one, see `ClusterManager`.
+            forward_events: list
+                The gateway events every cluster sends to the others as `cluster_<event>`.
         """
-
-        self.loop.run_until_complete(
-            self.gateway.connect(reconnect)
-        )
+        if clusters is not None:
+            return ClusterManager(self, clusters, forward_events).run(reconnect)
+
+        try:
+            self.loop.run_until_complete(
+                self.shards.connect(reconnect)
+            )
+        finally:
+            self.loop.run_until_complete(
+                self.close()
+            )
+
+    async def close(self) -> None:
+        """
+            Closes the gateway connections and the http session.
+            This method is a coroutine.
+        """
+        await self.shards.close()
+        await self.wait_tasks(5.0)
+        await self.http.close()
 
 class Client(BaseClient):
     """
@@ -210,6 +326,28 @@ class Client(BaseClient):
         debug: bool = True,
         loop: typing.Optional[asyncio.AbstractEventLoop] = None,
         activity: typing.Optional[str] = None,
+        global_rate_limit: typing.Optional[int] = None,
+        ratelimiter: typing.Optional["RateLimitBackend"] = None,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        retry_policy: typing.Optional["RetryPolicy"] = None,
+        response_cache: typing.Optional["ResponseCache"] = None,
+        codec: typing.Union[str, "JSONCodec", None] = None,
+        encoding: str = 'json',
+        compress: str = 'zlib-stream',
+        shard_count: typing.Optional[int] = None,
+        shard_ids: typing.Optional[typing.List[int]] = None,
+        concurrent_handlers: bool = False,
+        handler_concurrency: int = 100,
+        handler_timeout: typing.Optional[float] = None,
+        max_messages: typing.Optional[int] = 1000,
+        messages_per_channel: typing.Optional[int] = None,
+        message_ttl: typing.Optional[float] = None,
+        member_cache: str = 'everyone',
+        chunk_guilds: bool = False,
+        cache_policy: typing.Optional["CachePolicy"] = None,
     ) -> None:
         super(Client,self).__init__(
             token,
@@ -217,7 +355,29 @@ class Client(BaseClient):
             bot=bot,
             debug=debug,
             loop=loop,
-            activity=activity
+            activity=activity,
+            global_rate_limit=global_rate_limit,
+            ratelimiter=ratelimiter,
+            connection_limit=connection_limit,
+            connection_limit_per_host=connection_limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            dns_cache_ttl=dns_cache_ttl,
+            retry_policy=retry_policy,
+            response_cache=response_cache,
+            codec=codec,
+            encoding=encoding,
+            compress=compress,
+            shard_count=shard_count,
+            shard_ids=shard_ids,
+            concurrent_handlers=concurrent_handlers,
+            handler_concurrency=handler_concurrency,
+            handler_timeout=handler_timeout,
+            max_messages=max_messages,
+            messages_per_channel=messages_per_channel,
+            message_ttl=message_ttl,
+            member_cache=member_cache,
+            chunk_guilds=chunk_guilds,
+            cache_policy=cache_policy,
         )
         
         
\ No newline at end of file
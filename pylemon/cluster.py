@@ -0,0 +1,468 @@
+r"""
+    :copyright: (c) 2021 by Zaid Ali (email@xarty.xyz) / Hazem Meqdad(hazemmeqdad@gmail.com).
+    :license: MIT, see LICENSE for more details.
+
+    Runs the shards of a client in several processes, so decoding gateway events and running
+    the handlers use every core instead of sharing one interpreter lock.
+"""
+
+import os
+import typing
+import asyncio
+import inspect
+import itertools
+import tempfile
+import threading
+import multiprocessing
+import queue
+
+from pylemon.ratelimit import MemoryRateLimitBackend, RateLimitBroker, SharedRateLimitBackend
+from pylemon.shard import IdentifyScheduler
+
+if typing.TYPE_CHECKING:
+    from pylemon.client import BaseClient
+
+class ClusterBus:
+    """
+        The end of the event bus inside a cluster process, available as `client.cluster`.
+        Messages go through the parent process, which forwards them to the other clusters.
+
+        Events published on the bus are emitted on the other clusters as `cluster_<event>`
+        with the id of the publishing cluster and the data. Lookups run a function registered
+        with `register` on another cluster and return its result, every value has to be picklable.
+
+        Parameters
+        ----------
+        client: BaseClient
+            The client of this process.
+        cluster_id: int
+            The id of this cluster.
+        clusters: list
+            The shard ids of every cluster.
+        inbox: multiprocessing.Queue
+            The queue the parent sends this cluster's messages to.
+        outbox: multiprocessing.Queue
+            The queue every cluster sends its messages to the parent with.
+        forward_events: list
+            The gateway events sent to the other clusters as they are received.
+
+        Attributes
+        ----------
+        lookups : dict
+            The functions other clusters can call, by name.
+    """
+    def __init__(
+        self,
+        client: "BaseClient",
+        cluster_id: int,
+        clusters: typing.List[typing.List[int]],
+        inbox: multiprocessing.Queue,
+        outbox: multiprocessing.Queue,
+        forward_events: typing.Optional[typing.Iterable[str]] = None,
+    ) -> None:
+        self.client = client
+        self.cluster_id = cluster_id
+        self.clusters = clusters
+        self.inbox = inbox
+        self.outbox = outbox
+        self.forward_events: typing.Set[str] = {event.lower() for event in forward_events or ()}
+        self.forwarded: typing.Set[str] = {event.upper() for event in self.forward_events}
+
+        self.shard_clusters: typing.Dict[int, int] = {
+            shard_id: index for index, shard_ids in enumerate(clusters) for shard_id in shard_ids
+        }
+        self.nonces = itertools.count()
+        self.pending: typing.Dict[int, typing.Tuple[asyncio.Future, typing.List[typing.Any], int]] = {}
+        self.reader: typing.Optional[threading.Thread] = None
+
+        self.lookups: typing.Dict[str, typing.Callable] = {
+            'guild_ids': lambda: [guild.id for guild in self.client.guilds],
+            'guild_count': lambda: len(self.client.guilds),
+            'user_count': lambda: len(self.client.users),
+            'latencies': lambda: self.client.latencies,
+            'get_guild': self.guild_summary,
+        }
+
+    def register(self, name: str, func: typing.Callable) -> None:
+        """
+            Registers a function other clusters can call with `request`, it can be a coroutine function.
+
+            Parameters
+            ----------
+            name: str
+                The name of the lookup.
+            func: typing.Callable
+                The function.
+        """
+        self.lookups[name] = func
+
+    def guild_summary(self, guild_id: int) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        guild = self.client.get_guild(guild_id)
+        if guild is None:
+            return None
+        return {
+            'id': guild.id,
+            'name': guild.name,
+            'owner_id': guild.owner_id,
+            'member_count': guild.member_count,
+            'shard_id': guild.shard_id,
+        }
+
+    def cluster_of(self, guild_id: int) -> int:
+        """
+            Gets the id of the cluster running the shard of a guild.
+
+            Parameters
+            ----------
+            guild_id: int
+                The id of the guild.
+        """
+        return self.shard_clusters[self.client.shards.shard_id(guild_id)]
+
+    async def start(self) -> None:
+        """
+            Starts reading the messages the parent sends to this cluster.
+            The queue is read by a daemon thread, so a blocked read never keeps the process alive.
+        """
+        self.reader = threading.Thread(target=self.read, args=(asyncio.get_running_loop(),), daemon=True)
+        self.reader.start()
+
+    async def close(self) -> None:
+        """
+            Fails the pending lookups.
+        """
+        for future, results, remaining in self.pending.values():
+            if not future.done():
+                future.cancel()
+        self.pending.clear()
+
+    def read(self, loop: asyncio.AbstractEventLoop) -> None:
+        while True:
+            message = self.inbox.get()
+            if message is None or loop.is_closed():
+                break
+            asyncio.run_coroutine_threadsafe(self.dispatch(message), loop)
+
+    async def dispatch(self, message: typing.Tuple[typing.Any, ...]) -> None:
+        try:
+            await self.handle(message)
+        except Exception:
+            self.client.log.exception(f"Cluster {self.cluster_id} failed to handle {message[0]}")
+
+    async def handle(self, message: typing.Tuple[typing.Any, ...]) -> None:
+        kind = message[0]
+
+        if kind == 'publish':
+            _, source, event, data = message
+            await self.client.emit(f'cluster_{event}', source, data)
+
+        elif kind == 'request':
+            _, source, nonce, target, name, args = message
+            try:
+                result = self.lookups[name](*args)
+                if inspect.isawaitable(result):
+                    result = await result
+                reply = ('response', self.cluster_id, nonce, source, result, None)
+            except Exception as e:
+                reply = ('response', self.cluster_id, nonce, source, None, repr(e))
+            self.outbox.put(reply)
+
+        elif kind == 'response':
+            _, source, nonce, target, result, error = message
+            pending = self.pending.get(nonce)
+            if pending is None:
+                return
+            future, results, remaining = pending
+            if error is not None:
+                del self.pending[nonce]
+                if not future.done():
+                    future.set_exception(RuntimeError(f"Cluster {source}: {error}"))
+                return
+            results.append(result)
+            if remaining > 1:
+                self.pending[nonce] = (future, results, remaining - 1)
+                return
+            del self.pending[nonce]
+            if not future.done():
+                future.set_result(results)
+
+    async def publish(self, event: str, data: typing.Any) -> None:
+        """
+            Sends an event to every other cluster.
+
+            Parameters
+            ----------
+            event: str
+                The name of the event, emitted as `cluster_<event>`.
+            data: typing.Any
+                The data of the event.
+        """
+        self.outbox.put(('publish', self.cluster_id, event, data))
+
+    async def request(
+        self,
+        name: str,
+        *args,
+        cluster: typing.Optional[int] = None,
+        timeout: float = 5.0,
+    ) -> typing.Any:
+        """
+            Calls a lookup on another cluster and returns its result, or calls it on every cluster,
+            this one included, and returns the list of their results when `cluster` is not given.
+
+            Parameters
+            ----------
+            name: str
+                The name of the lookup.
+            args: typing.Any
+                The arguments of the lookup.
+            cluster: int
+                The id of the cluster to call it on.
+            timeout: float
+                How long to wait for the results in seconds.
+        """
+        nonce = next(self.nonces)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[nonce] = (future, [], 1 if cluster is not None else len(self.clusters))
+        self.outbox.put(('request', self.cluster_id, nonce, cluster, name, args))
+
+        try:
+            results = await asyncio.wait_for(future, timeout)
+        finally:
+            self.pending.pop(nonce, None)
+        return results[0] if cluster is not None else results
+
+    async def identify_slot(self, shard_id: int) -> float:
+        """
+            Reserves an identify slot for a shard from the parent's scheduler and returns the seconds to wait for it.
+
+            Parameters
+            ----------
+            shard_id: int
+                The id of the shard.
+        """
+        nonce = next(self.nonces)
+        future = asyncio.get_running_loop().create_future()
+        self.pending[nonce] = (future, [], 1)
+        self.outbox.put(('identify', self.cluster_id, nonce, shard_id))
+
+        try:
+            results = await future
+        finally:
+            self.pending.pop(nonce, None)
+        return results[0]
+
+    async def fetch_guild(self, guild_id: int, timeout: float = 5.0) -> typing.Optional[typing.Dict[str, typing.Any]]:
+        """
+            Gets the summary of a guild from the cluster running its shard.
+
+            Parameters
+            ----------
+            guild_id: int
+                The id of the guild.
+            timeout: float
+                How long to wait for the result in seconds.
+        """
+        return await self.request('get_guild', int(guild_id), cluster=self.cluster_of(guild_id), timeout=timeout)
+
+def run_cluster(
+    client: "BaseClient",
+    cluster_id: int,
+    clusters: typing.List[typing.List[int]],
+    shard_count: int,
+    inbox: multiprocessing.Queue,
+    outbox: multiprocessing.Queue,
+    reconnect: bool,
+    forward_events: typing.Optional[typing.Iterable[str]],
+    broker_path: typing.Optional[str],
+) -> None:
+    """
+        The entry point of a cluster process.
+    """
+    client.loop = asyncio.new_event_loop()
+    asyncio.set_event_loop(client.loop)
+
+    client.shards.shard_count = shard_count
+    client.shards.shard_ids = clusters[cluster_id]
+    if broker_path is not None:
+        client.http.ratelimiter = SharedRateLimitBackend(broker_path)
+
+    client.cluster = ClusterBus(client, cluster_id, clusters, inbox, outbox, forward_events)
+    client.loop.run_until_complete(client.cluster.start())
+    try:
+        client.connect(reconnect)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        client.loop.run_until_complete(client.cluster.close())
+
+class ClusterManager:
+    """
+        Splits the shards of a client between several processes and forwards the messages of their event bus.
+        It is used by `client.connect(clusters=...)`. The processes are forked, so this needs a unix host.
+
+        When the client uses the default in memory rate limits, the parent also runs a `RateLimitBroker`
+        in a process of its own and every cluster uses it, so the clusters share the per route and global limits.
+        The identifies of every cluster are spaced by one `IdentifyScheduler` in the parent.
+
+        Parameters
+        ----------
+        client: BaseClient
+            The client, it is copied to every process.
+        clusters: int
+            The number of processes, the number of cores if not given.
+        forward_events: list
+            The gateway events every cluster sends to the others.
+    """
+    def __init__(
+        self,
+        client: "BaseClient",
+        clusters: typing.Optional[int] = None,
+        forward_events: typing.Optional[typing.Iterable[str]] = None,
+    ) -> None:
+        self.client = client
+        self.cluster_count = clusters or os.cpu_count() or 1
+        self.forward_events = list(forward_events or ())
+        self.context = multiprocessing.get_context('fork')
+
+        self.processes: typing.List[multiprocessing.Process] = []
+        self.broker: typing.Optional[multiprocessing.Process] = None
+        self.inboxes: typing.List[multiprocessing.Queue] = []
+        self.outbox: multiprocessing.Queue = self.context.Queue()
+        self.identify_scheduler: typing.Optional[IdentifyScheduler] = None
+
+    def fetch_gateway(self) -> None:
+        loop = asyncio.new_event_loop()
+        try:
+            loop.run_until_complete(self.client.shards.fetch_gateway())
+        finally:
+            loop.run_until_complete(self.client.http.close())
+            loop.close()
+
+    def split(self, shard_ids: typing.List[int]) -> typing.List[typing.List[int]]:
+        """
+            Splits shards between the clusters, in contiguous runs.
+
+            Parameters
+            ----------
+            shard_ids: list
+                The ids of the shards.
+        """
+        count = min(self.cluster_count, len(shard_ids))
+        size, extra = divmod(len(shard_ids), count)
+        clusters, start = [], 0
+        for index in range(count):
+            end = start + size + (1 if index < extra else 0)
+            clusters.append(shard_ids[start:end])
+            start = end
+        return clusters
+
+    def run_broker(self, path: str, ready: "multiprocessing.synchronize.Event") -> None:
+        rate = self.client.http.ratelimiter.global_ratelimit.rate
+        broker = RateLimitBroker(path, rate)
+
+        async def serve():
+            await broker.start()
+            ready.set()
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await broker.close()
+
+        asyncio.run(serve())
+
+    def run(self, reconnect: bool) -> None:
+        """
+            Starts the clusters and forwards their messages until they all exit.
+
+            Parameters
+            ----------
+            reconnect: bool
+                Whether to reconnect to the gateway or not.
+        """
+        self.fetch_gateway()
+        shard_count = self.client.shards.shard_count
+        self.identify_scheduler = self.client.shards.identify_scheduler
+        shard_ids = self.client.shards.shard_ids
+        if shard_ids is None:
+            shard_ids = list(range(shard_count))
+        clusters = self.split(list(shard_ids))
+
+        broker_path = None
+        if isinstance(self.client.http.ratelimiter, MemoryRateLimitBackend):
+            broker_path = os.path.join(tempfile.mkdtemp(prefix='pylemon-'), 'ratelimit.sock')
+            # The parent forks while it runs no other thread, a thread holding a lock at fork time
+            # could leave the lock held forever in the child.
+            ready = self.context.Event()
+            self.broker = self.context.Process(
+                target=self.run_broker,
+                args=(broker_path, ready),
+                name='pylemon-ratelimit-broker',
+                daemon=True,
+            )
+            self.broker.start()
+            ready.wait()
+
+        self.client.log.info(f"Starting {len(clusters)} clusters for {shard_count} shards")
+
+        for cluster_id in range(len(clusters)):
+            inbox = self.context.Queue()
+            process = self.context.Process(
+                target=run_cluster,
+                args=(
+                    self.client, cluster_id, clusters, shard_count, inbox, self.outbox,
+                    reconnect, self.forward_events, broker_path,
+                ),
+                name=f'pylemon-cluster-{cluster_id}',
+            )
+            process.start()
+            self.inboxes.append(inbox)
+            self.processes.append(process)
+
+        try:
+            self.route()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+    def route(self) -> None:
+        """
+            Forwards the messages of the clusters until they all exit.
+        """
+        while any(process.is_alive() for process in self.processes):
+            try:
+                message = self.outbox.get(timeout=0.5)
+            except queue.Empty:
+                continue
+
+            kind = message[0]
+            if kind == 'publish':
+                for cluster_id, inbox in enumerate(self.inboxes):
+                    if cluster_id != message[1]:
+                        inbox.put(message)
+            elif kind == 'request':
+                target = message[3]
+                inboxes = self.inboxes if target is None else [self.inboxes[target]]
+                for inbox in inboxes:
+                    inbox.put(message)
+            elif kind == 'response':
+                self.inboxes[message[3]].put(message)
+            elif kind == 'identify':
+                _, source, nonce, shard_id = message
+                delay = self.identify_scheduler.reserve(shard_id)
+                self.inboxes[source].put(('response', None, nonce, source, delay, None))
+
+    def close(self) -> None:
+        """
+            Stops the clusters.
+        """
+        for inbox in self.inboxes:
+            inbox.put(None)
+        for process in self.processes:
+            process.join(5)
+            if process.is_alive():
+                process.terminate()
+        if self.broker is not None:
+            self.broker.terminate()
+            self.broker.join(5)
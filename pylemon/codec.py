@@ -0,0 +1,114 @@
+r"""
+    :copyright: (c) 2021 by Zaid Ali (email@xarty.xyz) / Hazem Meqdad(hazemmeqdad@gmail.com).
+    :license: MIT, see LICENSE for more details.
+
+    The json codecs used to decode rest responses and gateway events and to encode gateway payloads.
+    The fastest installed library is picked, falling back to the standard library.
+"""
+
+import json
+import typing
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgspec
+except ImportError:
+    msgspec = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+class JSONCodec:
+    """
+        The json codec of the standard library, and the interface of the other codecs.
+        `loads` takes the raw bytes of a payload so no codec has to decode them to a str first.
+    """
+    name: str = 'json'
+
+    def loads(self, data: typing.Union[bytes, bytearray, memoryview, str]) -> typing.Any:
+        """
+            Decodes a json document.
+
+            Parameters
+            ----------
+            data: bytes
+                The document, as bytes or str.
+        """
+        return json.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+    def dumps(self, obj: typing.Any) -> str:
+        """
+            Encodes an object to a json str.
+
+            Parameters
+            ----------
+            obj: typing.Any
+                The object to encode.
+        """
+        return json.dumps(obj, separators=(',', ':'), ensure_ascii=True)
+
+class OrjsonCodec(JSONCodec):
+    name: str = 'orjson'
+
+    def loads(self, data: typing.Union[bytes, bytearray, memoryview, str]) -> typing.Any:
+        return orjson.loads(data)
+
+    def dumps(self, obj: typing.Any) -> str:
+        return orjson.dumps(obj).decode('utf-8')
+
+class MsgspecCodec(JSONCodec):
+    name: str = 'msgspec'
+
+    def __init__(self) -> None:
+        self.decoder = msgspec.json.Decoder()
+        self.encoder = msgspec.json.Encoder()
+
+    def loads(self, data: typing.Union[bytes, bytearray, memoryview, str]) -> typing.Any:
+        return self.decoder.decode(data)
+
+    def dumps(self, obj: typing.Any) -> str:
+        return self.encoder.encode(obj).decode('utf-8')
+
+class UjsonCodec(JSONCodec):
+    name: str = 'ujson'
+
+    def loads(self, data: typing.Union[bytes, bytearray, memoryview, str]) -> typing.Any:
+        return ujson.loads(bytes(data) if isinstance(data, memoryview) else data)
+
+    def dumps(self, obj: typing.Any) -> str:
+        return ujson.dumps(obj, ensure_ascii=True)
+
+CODECS: typing.Dict[str, typing.Tuple[typing.Type[JSONCodec], typing.Any]] = {
+    'orjson': (OrjsonCodec, orjson),
+    'msgspec': (MsgspecCodec, msgspec),
+    'ujson': (UjsonCodec, ujson),
+    'json': (JSONCodec, json),
+}
+
+def get_codec(codec: typing.Union[str, JSONCodec, None] = None) -> JSONCodec:
+    """
+        Gets a json codec.
+
+        Parameters
+        ----------
+        codec: str or JSONCodec
+            The name of the codec, or a codec instance. The fastest installed codec is used if not given.
+    """
+    if isinstance(codec, JSONCodec):
+        return codec
+
+    if codec is not None:
+        cls, module = CODECS[codec]
+        if module is None:
+            raise ImportError(f"The {codec} codec needs the {codec} package")
+        return cls()
+
+    for cls, module in CODECS.values():
+        if module is not None:
+            return cls()
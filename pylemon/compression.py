@@ -0,0 +1,157 @@
+r"""
+    :copyright: (c) 2021 by Zaid Ali (email@xarty.xyz) / Hazem Meqdad(hazemmeqdad@gmail.com).
+    :license: MIT, see LICENSE for more details.
+
+    Transport decompression of the gateway stream.
+"""
+
+import time
+import zlib
+import typing
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+class Inflator:
+    """
+        The base of the gateway stream decompressors.
+        It keeps the decompression context of the connection and counts the bytes going in and out.
+
+        Attributes
+        ----------
+        bytes_in : int
+            The number of compressed bytes received.
+        bytes_out : int
+            The number of decompressed bytes produced.
+        in_rate : float
+            The compressed bytes per second over the last sample window.
+        out_rate : float
+            The decompressed bytes per second over the last sample window.
+    """
+    name: str = ''
+    SAMPLE_WINDOW: float = 1.0
+
+    def __init__(self) -> None:
+        self.bytes_in: int = 0
+        self.bytes_out: int = 0
+        self.in_rate: float = 0.0
+        self.out_rate: float = 0.0
+
+        self.sampled_at: float = time.monotonic()
+        self.sampled_in: int = 0
+        self.sampled_out: int = 0
+
+    def feed(self, data: bytes) -> typing.Optional[bytes]:
+        """
+            Feeds a websocket frame to the decompressor.
+            Returns the decompressed payload once a whole message was received, None otherwise.
+
+            Parameters
+            ----------
+            data: bytes
+                The frame.
+        """
+        raise NotImplementedError
+
+    def reset(self) -> None:
+        """
+            Starts a new stream, this has to be called for every new connection.
+        """
+        raise NotImplementedError
+
+    def _count(self, received: int, produced: int) -> None:
+        self.bytes_in += received
+        self.bytes_out += produced
+
+        now = time.monotonic()
+        elapsed = now - self.sampled_at
+        if elapsed >= self.SAMPLE_WINDOW:
+            self.in_rate = (self.bytes_in - self.sampled_in) / elapsed
+            self.out_rate = (self.bytes_out - self.sampled_out) / elapsed
+            self.sampled_at, self.sampled_in, self.sampled_out = now, self.bytes_in, self.bytes_out
+
+    @property
+    def ratio(self) -> float:
+        """
+            The compression ratio of the stream so far.
+        """
+        return self.bytes_out / self.bytes_in if self.bytes_in else 0.0
+
+class ZlibInflator(Inflator):
+    """
+        The `compress=zlib-stream` decompressor.
+        A message ends with the zlib sync flush suffix, frames that don't end with it are
+        partial and are kept until the rest of the message arrives. A whole message in a
+        single frame, the usual case, is inflated straight from the frame without copying it.
+    """
+    name: str = 'zlib-stream'
+    SUFFIX: bytes = b'\x00\x00\xff\xff'
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.buffer = bytearray()
+        self.decompressobj = zlib.decompressobj()
+
+    def reset(self) -> None:
+        self.buffer.clear()
+        self.decompressobj = zlib.decompressobj()
+
+    def feed(self, data: bytes) -> typing.Optional[bytes]:
+        if not data.endswith(self.SUFFIX):
+            self.buffer += data
+            self._count(len(data), 0)
+            return None
+
+        if not self.buffer:
+            payload = self.decompressobj.decompress(data)
+        else:
+            self.buffer += data
+            with memoryview(self.buffer) as view:
+                payload = self.decompressobj.decompress(view)
+            self.buffer.clear()
+
+        self._count(len(data), len(payload))
+        return payload
+
+class ZstdInflator(Inflator):
+    """
+        The `compress=zstd-stream` decompressor, it needs the `zstandard` package.
+        Discord flushes the stream at the end of every message, so every websocket message
+        decompresses to a whole payload.
+    """
+    name: str = 'zstd-stream'
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.decompressor = zstandard.ZstdDecompressor()
+        self.decompressobj = self.decompressor.decompressobj()
+
+    def reset(self) -> None:
+        self.decompressobj = self.decompressor.decompressobj()
+
+    def feed(self, data: bytes) -> typing.Optional[bytes]:
+        payload = self.decompressobj.decompress(data)
+        self._count(len(data), len(payload))
+        return payload or None
+
+INFLATORS: typing.Dict[str, typing.Tuple[typing.Type[Inflator], typing.Any]] = {
+    'zstd-stream': (ZstdInflator, zstandard),
+    'zlib-stream': (ZlibInflator, zlib),
+}
+
+def get_inflator(compress: str = 'zlib-stream') -> Inflator:
+    """
+        Gets the decompressor of a transport compression, falling back to zlib-stream
+        when the library it needs is not installed.
+
+        Parameters
+        ----------
+        compress: str
+            The transport compression, `zlib-stream` or `zstd-stream`.
+    """
+    cls, module = INFLATORS[compress]
+    if module is None:
+        return ZlibInflator()
+    return cls()
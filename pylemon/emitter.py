@@ -4,35 +4,131 @@ r"""
 """
 
 import typing
+import asyncio
 
 if typing.TYPE_CHECKING:
     from pylemon.client import BaseClient
     from pylemon.plugin import Plugin
 
 class Emitter:
+    """
+        Keeps the callbacks of every event, by event name.
+
+        Callbacks added with `ordered=True`, like the cache's, are awaited one after the other before
+        the rest. The rest are awaited in turn too, or run as tasks when `concurrent` is set, at most
+        `concurrency` at a time per event, `emit` waiting for a task to finish past that. An error or
+        a timeout in a callback is logged and emitted as `error` without stopping the other callbacks
+        or the gateway.
+
+        Attributes
+        ----------
+        events : dict
+            The callbacks of every event that has any, by event name.
+        listened : set
+            The gateway names of the events in `events`, upper case like in the payloads,
+            and of the events their `raw_` events are emitted for.
+        concurrent : bool
+            Whether the callbacks that are not ordered run as tasks.
+        concurrency : int
+            The number of tasks of an event that run at the same time.
+        timeout : float
+            The seconds a callback may run before it is cancelled, no limit if None.
+    """
     def __init__(
         self,
         client: "BaseClient",
     ) -> None:
         self.client = client
         self.loop = self.client.loop
-        self.events = []
+        self.events: typing.Dict[str, typing.List[typing.Callable]] = {}
+        self.listened: typing.Set[str] = set()
+
+        self.concurrent: bool = False
+        self.concurrency: int = 100
+        self.timeout: typing.Optional[float] = None
+
+        self.ordered: typing.Set[typing.Callable] = set()
+        self.handlers: typing.Dict[str, typing.Tuple[typing.Tuple[typing.Callable, ...], typing.Tuple[typing.Callable, ...]]] = {}
+        self.semaphores: typing.Dict[str, asyncio.Semaphore] = {}
+        self.tasks: typing.Set[asyncio.Task] = set()
             
 
     def add_event(
         self,
         event: str,
         callback: typing.Callable,
+        ordered: bool = False,
     ) -> None:
-        self.events.append((event.lower(), callback))
+        """
+            Adds a callback to an event.
+
+            Parameters
+            ----------
+            event: str
+                The event.
+            callback: typing.Callable
+                The coroutine function to call.
+            ordered: bool
+                Whether the callback is awaited in order with the other ordered callbacks, before the rest.
+        """
+        event = event.lower()
+        self.events.setdefault(event, []).append(callback)
+        self.listened.add(event.upper())
+        if event.startswith('raw_'):
+            self.listened.add(event[4:].upper())
+        if ordered:
+            self.ordered.add(callback)
+        self.compile(event)
+
+    def listening(self, event: str) -> bool:
+        """
+            Whether an event has callbacks.
+
+            Parameters
+            ----------
+            event: str
+                The event, by its name or its gateway name.
+        """
+        return event in self.listened or event in self.events
 
     def remove_event(
         self,
         event: str,
+        callback: typing.Optional[typing.Callable] = None,
     ) -> None:
-        for event_, callback in self.events:
-            if event_ == event:
-                self.events.remove((event, callback))
+        """
+            Removes the callbacks of an event.
+
+            Parameters
+            ----------
+            event: str
+                The event.
+            callback: typing.Callable
+                The callback to remove, every callback of the event if not given.
+        """
+        event = event.lower()
+        callbacks = self.events.get(event)
+        if callbacks is None:
+            return
+        if callback is None:
+            callbacks.clear()
+        elif callback in callbacks:
+            callbacks.remove(callback)
+        if not callbacks:
+            del self.events[event]
+            self.listened = {name.upper() for name in self.events}
+            self.listened.update(name[4:].upper() for name in self.events if name.startswith('raw_'))
+        self.compile(event)
+
+    def compile(self, event: str) -> None:
+        callbacks = self.events.get(event)
+        if callbacks is None:
+            self.handlers.pop(event, None)
+            return
+        self.handlers[event] = (
+            tuple(callback for callback in callbacks if callback in self.ordered),
+            tuple(callback for callback in callbacks if callback not in self.ordered),
+        )
 
     async def emit(
         self,
@@ -40,6 +136,67 @@ class Emitter:
         *args,
         **kwargs,
     ) -> None:
-        for event_, callback in self.events:
-            if event_ == event:
-                await callback(*args, **kwargs)
\ No newline at end of file
+        handlers = self.handlers.get(event)
+        if handlers is None:
+            return
+        ordered, callbacks = handlers
+
+        for callback in ordered:
+            await self.run(event, callback, None, args, kwargs)
+
+        if not self.concurrent:
+            for callback in callbacks:
+                await self.run(event, callback, self.timeout, args, kwargs)
+            return
+
+        semaphore = self.semaphores.get(event)
+        if semaphore is None:
+            semaphore = self.semaphores[event] = asyncio.Semaphore(self.concurrency)
+
+        for callback in callbacks:
+            # Waiting here rather than in the task bounds the tasks of an event, and slows the
+            # gateway down instead of queuing tasks without limit when the callbacks fall behind.
+            await semaphore.acquire()
+            task = asyncio.ensure_future(self.run(event, callback, self.timeout, args, kwargs))
+            self.tasks.add(task)
+            task.add_done_callback(self.tasks.discard)
+            task.add_done_callback(lambda _: semaphore.release())
+
+    async def run(
+        self,
+        event: str,
+        callback: typing.Callable,
+        timeout: typing.Optional[float],
+        args: tuple,
+        kwargs: dict,
+    ) -> None:
+        try:
+            if timeout is None:
+                await callback(*args, **kwargs)
+            else:
+                await asyncio.wait_for(callback(*args, **kwargs), timeout)
+        except asyncio.CancelledError:
+            raise
+        except asyncio.TimeoutError as e:
+            self.client.log.warning(f"{getattr(callback, '__qualname__', callback)} timed out handling {event}")
+            if event != 'error':
+                await self.emit('error', event, e)
+        except Exception as e:
+            self.client.log.exception(f"{getattr(callback, '__qualname__', callback)} failed handling {event}")
+            if event != 'error':
+                await self.emit('error', event, e)
+
+    async def wait_tasks(self, timeout: typing.Optional[float] = None) -> None:
+        """
+            Waits for the callbacks running as tasks, cancelling the ones still running after `timeout`.
+
+            Parameters
+            ----------
+            timeout: float
+                The seconds to wait, no limit if None.
+        """
+        if not self.tasks:
+            return
+        done, pending = await asyncio.wait(set(self.tasks), timeout=timeout)
+        for task in pending:
+            task.cancel()
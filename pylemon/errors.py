@@ -0,0 +1,80 @@
+r"""
+    :copyright: (c) 2021 by Zaid Ali (email@xarty.xyz) / Hazem Meqdad(hazemmeqdad@gmail.com).
+    :license: MIT, see LICENSE for more details.
+"""
+
+import typing
+
+class PylemonException(Exception):
+    """
+        The base exception of pylemon.
+    """
+
+class HTTPException(PylemonException):
+    """
+        Raised when discord answers a request with an error.
+
+        Attributes
+        ----------
+        status : int
+            The http status of the response.
+        code : int
+            The discord error code, 0 if there is none.
+        text : str
+            The error message.
+        data : typing.Any
+            The body of the response.
+    """
+    def __init__(
+        self,
+        status: int,
+        data: typing.Any,
+    ) -> None:
+        self.status = status
+        self.data = data
+
+        if isinstance(data, dict):
+            self.code: int = data.get('code', 0)
+            self.text: str = data.get('message', '')
+        else:
+            self.code: int = 0
+            self.text: str = data or ''
+
+        super().__init__(f'{self.status} (error code: {self.code}): {self.text}')
+
+class Forbidden(HTTPException):
+    """
+        Raised on a 403.
+    """
+
+class NotFound(HTTPException):
+    """
+        Raised on a 404.
+    """
+
+class DiscordServerError(HTTPException):
+    """
+        Raised on a 5xx that is still failing after the retries.
+    """
+
+class ConnectionClosed(PylemonException):
+    """
+        Raised when discord closes a gateway connection with a code we can't reconnect after,
+        like an invalid token or intents the bot isn't allowed to use.
+
+        Attributes
+        ----------
+        code : int
+            The close code.
+        shard_id : int
+            The id of the shard.
+    """
+    def __init__(
+        self,
+        code: int,
+        shard_id: int,
+    ) -> None:
+        self.code = code
+        self.shard_id = shard_id
+
+        super().__init__(f'Shard {shard_id} was closed with code {code}')
@@ -0,0 +1,242 @@
+r"""
+    :copyright: (c) 2021 by Zaid Ali (email@xarty.xyz) / Hazem Meqdad(hazemmeqdad@gmail.com).
+    :license: MIT, see LICENSE for more details.
+
+    Erlang term format codec for the gateway's `encoding=etf`.
+    Snowflakes arrive as integers instead of strings, binaries are decoded to str and
+    atoms to str, None, True or False, so the payloads look like the json ones.
+    The decoder is pure python, it is about 5 times slower than the stdlib json one on a large
+    GUILD_CREATE, see `benchmarks/gateway_encoding.py`.
+"""
+
+import zlib
+import struct
+import typing
+
+VERSION = 131
+
+NEW_FLOAT_EXT = 70
+COMPRESSED = 80
+SMALL_INTEGER_EXT = 97
+INTEGER_EXT = 98
+FLOAT_EXT = 99
+ATOM_EXT = 100
+SMALL_TUPLE_EXT = 104
+LARGE_TUPLE_EXT = 105
+NIL_EXT = 106
+STRING_EXT = 107
+LIST_EXT = 108
+BINARY_EXT = 109
+SMALL_BIG_EXT = 110
+LARGE_BIG_EXT = 111
+SMALL_ATOM_EXT = 115
+MAP_EXT = 116
+ATOM_UTF8_EXT = 118
+SMALL_ATOM_UTF8_EXT = 119
+
+ATOMS: typing.Dict[bytes, typing.Any] = {
+    b'nil': None,
+    b'true': True,
+    b'false': False,
+}
+
+_int32 = struct.Struct('>i')
+_uint32 = struct.Struct('>I')
+_uint16 = struct.Struct('>H')
+_double = struct.Struct('>d')
+
+class ETFDecodeError(ValueError):
+    """
+        Raised when a payload is not valid erlang term format.
+    """
+
+class ETFCodec:
+    """
+        Encodes and decodes the erlang term format, with the same interface as the json codecs.
+        `dumps` returns bytes, they have to be sent as a binary websocket frame.
+    """
+    name: str = 'etf'
+
+    def __init__(self) -> None:
+        self.atoms: typing.Dict[bytes, typing.Any] = dict(ATOMS)
+
+    def loads(self, data: typing.Union[bytes, bytearray, memoryview]) -> typing.Any:
+        """
+            Decodes an erlang term.
+
+            Parameters
+            ----------
+            data: bytes
+                The term, starting with the version byte.
+        """
+        data = bytes(data)
+        if not data or data[0] != VERSION:
+            raise ETFDecodeError(f"Unknown erlang term format version {data[:1]!r}")
+
+        if data[1] == COMPRESSED:
+            size = _uint32.unpack_from(data, 2)[0]
+            data = b'\x83' + zlib.decompress(data[6:], bufsize=size)
+
+        try:
+            term, offset = self._decode(data, 1)
+        except (IndexError, struct.error) as e:
+            raise ETFDecodeError("Truncated erlang term") from e
+        # Slicing a binary past the end doesn't fail, a truncated one is seen here.
+        if offset != len(data):
+            raise ETFDecodeError("Truncated erlang term" if offset > len(data) else "Trailing data after the erlang term")
+        return term
+
+    def _atom(self, name: bytes) -> typing.Any:
+        atom = self.atoms.get(name, name)
+        if atom is name:
+            atom = self.atoms[name] = name.decode('utf-8')
+        return atom
+
+    def _decode(self, data: bytes, offset: int) -> typing.Tuple[typing.Any, int]:
+        tag = data[offset]
+        offset += 1
+
+        if tag == BINARY_EXT:
+            size = _uint32.unpack_from(data, offset)[0]
+            offset += 4
+            return data[offset:offset + size].decode('utf-8'), offset + size
+
+        elif tag == SMALL_INTEGER_EXT:
+            return data[offset], offset + 1
+
+        elif tag == MAP_EXT:
+            arity = _uint32.unpack_from(data, offset)[0]
+            offset += 4
+            decode = self._decode
+            result = {}
+            for _ in range(arity):
+                key, offset = decode(data, offset)
+                result[key], offset = decode(data, offset)
+            return result, offset
+
+        elif tag == SMALL_ATOM_UTF8_EXT or tag == SMALL_ATOM_EXT:
+            size = data[offset]
+            offset += 1
+            return self._atom(data[offset:offset + size]), offset + size
+
+        elif tag == INTEGER_EXT:
+            return _int32.unpack_from(data, offset)[0], offset + 4
+
+        elif tag == SMALL_BIG_EXT or tag == LARGE_BIG_EXT:
+            if tag == SMALL_BIG_EXT:
+                size = data[offset]
+                offset += 1
+            else:
+                size = _uint32.unpack_from(data, offset)[0]
+                offset += 4
+            sign = data[offset]
+            value = int.from_bytes(data[offset + 1:offset + 1 + size], 'little')
+            return (-value if sign else value), offset + 1 + size
+
+        elif tag == LIST_EXT:
+            length = _uint32.unpack_from(data, offset)[0]
+            offset += 4
+            decode = self._decode
+            result = [None] * length
+            for i in range(length):
+                result[i], offset = decode(data, offset)
+            tail, offset = decode(data, offset)
+            if tail != []:
+                result.append(tail)
+            return result, offset
+
+        elif tag == NIL_EXT:
+            return [], offset
+
+        elif tag == ATOM_UTF8_EXT or tag == ATOM_EXT:
+            size = _uint16.unpack_from(data, offset)[0]
+            offset += 2
+            return self._atom(data[offset:offset + size]), offset + size
+
+        elif tag == NEW_FLOAT_EXT:
+            return _double.unpack_from(data, offset)[0], offset + 8
+
+        elif tag == STRING_EXT:
+            size = _uint16.unpack_from(data, offset)[0]
+            offset += 2
+            return data[offset:offset + size].decode('latin-1'), offset + size
+
+        elif tag == SMALL_TUPLE_EXT or tag == LARGE_TUPLE_EXT:
+            if tag == SMALL_TUPLE_EXT:
+                arity = data[offset]
+                offset += 1
+            else:
+                arity = _uint32.unpack_from(data, offset)[0]
+                offset += 4
+            result = []
+            for _ in range(arity):
+                item, offset = self._decode(data, offset)
+                result.append(item)
+            return tuple(result), offset
+
+        elif tag == FLOAT_EXT:
+            return float(data[offset:offset + 31].rstrip(b'\x00')), offset + 31
+
+        raise ETFDecodeError(f"Unknown erlang term tag {tag}")
+
+    def dumps(self, obj: typing.Any) -> bytes:
+        """
+            Encodes an object to an erlang term.
+
+            Parameters
+            ----------
+            obj: typing.Any
+                The object to encode.
+        """
+        buffer = bytearray(b'\x83')
+        self._encode(obj, buffer)
+        return bytes(buffer)
+
+    def _encode(self, obj: typing.Any, buffer: bytearray) -> None:
+        if obj is None:
+            buffer += b'\x77\x03nil'
+        elif obj is True:
+            buffer += b'\x77\x04true'
+        elif obj is False:
+            buffer += b'\x77\x05false'
+        elif isinstance(obj, int):
+            if 0 <= obj <= 255:
+                buffer.append(SMALL_INTEGER_EXT)
+                buffer.append(obj)
+            elif -2 ** 31 <= obj < 2 ** 31:
+                buffer.append(INTEGER_EXT)
+                buffer += _int32.pack(obj)
+            else:
+                value = abs(obj)
+                digits = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+                if len(digits) > 255:
+                    raise ValueError("Integer is too big to encode")
+                buffer.append(SMALL_BIG_EXT)
+                buffer.append(len(digits))
+                buffer.append(1 if obj < 0 else 0)
+                buffer += digits
+        elif isinstance(obj, float):
+            buffer.append(NEW_FLOAT_EXT)
+            buffer += _double.pack(obj)
+        elif isinstance(obj, (str, bytes, bytearray)):
+            raw = obj.encode('utf-8') if isinstance(obj, str) else obj
+            buffer.append(BINARY_EXT)
+            buffer += _uint32.pack(len(raw))
+            buffer += raw
+        elif isinstance(obj, dict):
+            buffer.append(MAP_EXT)
+            buffer += _uint32.pack(len(obj))
+            for key, value in obj.items():
+                self._encode(key, buffer)
+                self._encode(value, buffer)
+        elif isinstance(obj, (list, tuple)):
+            if not obj:
+                buffer.append(NIL_EXT)
+                return
+            buffer.append(LIST_EXT)
+            buffer += _uint32.pack(len(obj))
+            for item in obj:
+                self._encode(item, buffer)
+            buffer.append(NIL_EXT)
+        else:
+            raise TypeError(f"Object of type {type(obj).__name__} can't be encoded to etf")
@@ -21,6 +21,7 @@ class Events:
     guildMemberAdd = 'guild_member_add'
     guildMemberUpdate = 'guild_member_update'
     guildMemberRemove = 'guild_member_remove'
+    guildMembersChunk = 'guild_members_chunk'
 
     guildRoleCreate = 'guild_role_create'
     guildRoleUpdate = 'guild_role_update'
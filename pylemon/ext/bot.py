@@ -8,10 +8,13 @@ import asyncio
 
 if typing.TYPE_CHECKING:
     from pylemon.plugin import Plugin
+    from pylemon.ratelimit import RateLimitBackend
+    from pylemon.http import RetryPolicy, ResponseCache
+    from pylemon.codec import JSONCodec
 
 from pylemon.client import BaseClient
 from pylemon.intents import Intents
-from pylemon.cache import GatewayCache
+from pylemon.cache import GatewayCache, CachePolicy
 from pylemon.types import Message
 
 from rich import print
@@ -28,8 +31,60 @@ class Bot(BaseClient):
         cache_client: object = GatewayCache,
         loop: typing.Optional[asyncio.AbstractEventLoop] = None,
         activity: typing.Optional[str] = None,
+        global_rate_limit: typing.Optional[int] = None,
+        ratelimiter: typing.Optional["RateLimitBackend"] = None,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        retry_policy: typing.Optional["RetryPolicy"] = None,
+        response_cache: typing.Optional["ResponseCache"] = None,
+        codec: typing.Union[str, "JSONCodec", None] = None,
+        encoding: str = 'json',
+        compress: str = 'zlib-stream',
+        shard_count: typing.Optional[int] = None,
+        shard_ids: typing.Optional[typing.List[int]] = None,
+        concurrent_handlers: bool = False,
+        handler_concurrency: int = 100,
+        handler_timeout: typing.Optional[float] = None,
+        max_messages: typing.Optional[int] = 1000,
+        messages_per_channel: typing.Optional[int] = None,
+        message_ttl: typing.Optional[float] = None,
+        member_cache: str = 'everyone',
+        chunk_guilds: bool = False,
+        cache_policy: typing.Optional["CachePolicy"] = None,
     ) -> None:
-        super().__init__(token, intents, bot=bot, debug=debug, cache_client=cache_client, loop=loop, activity=activity)
+        super().__init__(
+            token,
+            intents,
+            bot=bot,
+            debug=debug,
+            cache_client=cache_client,
+            loop=loop,
+            activity=activity,
+            global_rate_limit=global_rate_limit,
+            ratelimiter=ratelimiter,
+            connection_limit=connection_limit,
+            connection_limit_per_host=connection_limit_per_host,
+            keepalive_timeout=keepalive_timeout,
+            dns_cache_ttl=dns_cache_ttl,
+            retry_policy=retry_policy,
+            response_cache=response_cache,
+            codec=codec,
+            encoding=encoding,
+            compress=compress,
+            shard_count=shard_count,
+            shard_ids=shard_ids,
+            concurrent_handlers=concurrent_handlers,
+            handler_concurrency=handler_concurrency,
+            handler_timeout=handler_timeout,
+            max_messages=max_messages,
+            messages_per_channel=messages_per_channel,
+            message_ttl=message_ttl,
+            member_cache=member_cache,
+            chunk_guilds=chunk_guilds,
+            cache_policy=cache_policy,
+        )
         self.prefix = prefix
         self.commands = []
 
@@ -89,7 +144,13 @@ class Bot(BaseClient):
             self.commands.append((name, callback, args))
         return super().add_plugin(plugin)
     
-    def connect(self, reconnect: bool = True, custom_handler: typing.Awaitable = None) -> None:
+    def connect(
+        self,
+        reconnect: bool = True,
+        custom_handler: typing.Awaitable = None,
+        clusters: typing.Optional[int] = None,
+        forward_events: typing.Optional[typing.List[str]] = None,
+    ) -> None:
         """
             Connect to the gateway and add the command handler.
 
@@ -97,9 +158,13 @@ class Bot(BaseClient):
             ----------
             reconnect : bool
                 Whether to reconnect or not.
+            clusters : int
+                Runs the shards in this many processes, see `BaseClient.connect`.
+            forward_events : list
+                The gateway events every cluster sends to the others.
         """
         if custom_handler is None:
             custom_handler = self.on_message
         self.add_event('message_create', custom_handler)
 
-        return super().connect(reconnect=reconnect)
\ No newline at end of file
+        return super().connect(reconnect=reconnect, clusters=clusters, forward_events=forward_events)
\ No newline at end of file
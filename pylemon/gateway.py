@@ -5,16 +5,19 @@ r"""
 
 import asyncio
 import typing
+import random
+import time
+import collections
 import aiohttp
-import zlib
-import json
 
 from pylemon.utils import deserialize_channel
+from pylemon.etf import ETFCodec
+from pylemon.compression import get_inflator
+from pylemon.errors import ConnectionClosed
 
 if typing.TYPE_CHECKING:
     from pylemon.client import BaseClient
 
-from pylemon.state import DataType, EventState
 from pylemon.types import *
 
 class Packets:
@@ -31,142 +34,535 @@ class Packets:
     Hello = 10
     HeartbeatACK = 11 
 
+class Heartbeat:
+    """
+        Keeps a gateway connection alive and measures its latency.
+        The first heartbeat is sent after a random part of the interval, so shards that connected together
+        don't beat together. When a heartbeat is due while the previous one wasn't acknowledged, the
+        connection is a zombie and it is closed so the gateway resumes the session on a new one.
+
+        Parameters
+        ----------
+        gateway: Gateway
+            The gateway.
+        window: int
+            The number of latency samples kept.
+
+        Attributes
+        ----------
+        samples : collections.deque
+            The latencies of the last acknowledged heartbeats in seconds.
+    """
+    BUCKETS: typing.Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, float('inf'))
+
+    def __init__(
+        self,
+        gateway: "Gateway",
+        window: int = 100,
+    ) -> None:
+        self.gateway = gateway
+        self.samples: typing.Deque[float] = collections.deque(maxlen=window)
+
+        self.interval: float = 0.0
+        self.sent_at: typing.Optional[float] = None
+        self.acked = True
+        self.task: typing.Optional[asyncio.Task] = None
+
+    @property
+    def latency(self) -> typing.Optional[float]:
+        """
+            The latency of the last acknowledged heartbeat in seconds, None before the first one.
+        """
+        return self.samples[-1] if self.samples else None
+
+    def histogram(self) -> typing.Dict[float, int]:
+        """
+            Counts the kept latency samples by bucket, keyed by the upper bound of the bucket in seconds.
+        """
+        counts = dict.fromkeys(self.BUCKETS, 0)
+        for sample in self.samples:
+            for bound in self.BUCKETS:
+                if sample <= bound:
+                    counts[bound] += 1
+                    break
+        return counts
+
+    def start(self, interval: float) -> None:
+        """
+            Starts beating on a new connection.
+
+            Parameters
+            ----------
+            interval: float
+                The heartbeat interval from HELLO in seconds.
+        """
+        self.stop()
+        self.interval = interval
+        self.sent_at = None
+        self.acked = True
+        self.task = asyncio.ensure_future(self.run())
+
+    def stop(self) -> None:
+        """
+            Stops beating, when the connection ends.
+        """
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+    async def run(self) -> None:
+        try:
+            await asyncio.sleep(self.interval * random.random())
+            while True:
+                if not self.acked:
+                    self.gateway.client.log.warning(
+                        f"Shard {self.gateway.shard_id} didn't acknowledge its last heartbeat, reconnecting"
+                    )
+                    self.task = None
+                    await self.gateway.reconnect_session()
+                    return
+                await self.beat()
+                await asyncio.sleep(self.interval)
+        except ConnectionError:
+            pass
+
+    async def beat(self) -> None:
+        """
+            Sends a heartbeat now, discord can ask for one with op 1.
+        """
+        self.acked = False
+        self.sent_at = time.perf_counter()
+        await self.gateway.send(Packets.Heartbeat, self.gateway.seq or None)
+
+    def ack(self) -> None:
+        """
+            Records the acknowledgement of the last heartbeat.
+        """
+        if self.sent_at is not None and not self.acked:
+            self.samples.append(time.perf_counter() - self.sent_at)
+        self.acked = True
+
 class Gateway:
+    """
+        A connection to the discord gateway, for one shard.
+
+        Parameters
+        ----------
+        client: BaseClient
+            The client.
+        shard_id: int
+            The id of the shard.
+        shard_count: int
+            The total number of shards.
+
+        Attributes
+        ----------
+        state : str
+            The state of the connection, `disconnected`, `connecting`, `identifying`, `resuming` or `ready`.
+        session_id : str
+            The id of the session, kept between connections to resume it.
+        seq : int
+            The sequence number of the last event received, the events after it are replayed on resume.
+        heartbeat : Heartbeat
+            Keeps the connection alive and measures its latency.
+    """
+    GATEWAY = "wss://gateway.discord.gg"
+    # The close codes after which reconnecting can't work.
+    FATAL_CLOSE_CODES = (4004, 4010, 4011, 4012, 4013, 4014)
+    # The close codes after which the session can't be resumed.
+    SESSION_CLOSE_CODES = (4007, 4009)
+    # The events the gateway needs itself, they are never dropped.
+    HANDLED_EVENTS = frozenset(('READY', 'RESUMED', 'GUILD_MEMBERS_CHUNK'))
+    # The failed attempts on the resume url after which the session is dropped for a new one on the default url.
+    RESUME_ATTEMPTS = 3
+    # The events also emitted with their payload, for the messages that are not cached.
+    RAW_EVENTS = {
+        event: f'raw_{event}' for event in (
+            'message_update', 'message_delete', 'message_reaction_add', 'message_reaction_remove',
+        )
+    }
+
     def __init__(
         self,
         client: "BaseClient",
+        shard_id: int = 0,
+        shard_count: int = 1,
     ) -> None:
         self.client = client
         self.loop = client.loop
 
-        self.event = EventState(client)
+        self.shard_id = shard_id
+        self.shard_count = shard_count
+        self.state = 'disconnected'
 
-        self.buffer = bytearray()
-        self.inflator = zlib.decompressobj()
+        self.inflator = get_inflator(client.compress)
 
-        self.gateway = "wss://gateway.discord.gg/?v=9&encoding=json&compress=zlib-stream"
+        self.encoding = client.encoding
+        self.payload_codec = ETFCodec() if self.encoding == 'etf' else client.codec
+
+        self.query = f"/?v=9&encoding={self.encoding}&compress={self.inflator.name}"
 
         self.seq = 0
         self.session_id = None
+        self.resume_gateway_url: typing.Optional[str] = None
+        self.websocket: typing.Optional[aiohttp.ClientWebSocketResponse] = None
+        self.heartbeat = Heartbeat(self)
+        self.identifier: typing.Optional[asyncio.Task] = None
+        self.closing = False
+        self.closed: typing.Optional[asyncio.Event] = None
+        self.attempts = 0
+
+        # The events the gateway handles itself, and the parsers of the events emitted to the callbacks.
+        self.handlers: typing.Dict[str, typing.Callable] = {
+            'ready': self.handle_ready,
+            'resumed': self.handle_resumed,
+            'guild_members_chunk': self.handle_members_chunk,
+        }
+        self.parsers: typing.Dict[str, typing.Callable] = {
+            name[6:]: getattr(self, name) for name in dir(self) if name.startswith('parse_')
+        }
+
+    @property
+    def latency(self) -> typing.Optional[float]:
+        """
+            The time between the last heartbeat and its acknowledgement in seconds, None before the first one.
+        """
+        return self.heartbeat.latency
+
+    @property
+    def url(self) -> str:
+        """
+            The url to connect to, the session's resume url when it can be resumed.
+        """
+        if self.session_id is not None and self.resume_gateway_url:
+            return self.resume_gateway_url.rstrip('/') + self.query
+        return self.GATEWAY + self.query
 
     async def connect(self,reconnect: bool):
         self.reconnect = reconnect
+        self.closing = False
+        # Set by `close`, it ends the wait between two attempts.
+        self.closed = asyncio.Event()
+
+        if self.inflator.name != self.client.compress:
+            self.client.log.warning(f"{self.client.compress} is not available, using {self.inflator.name}")
+
+        while not self.closing:
+            self.state = 'connecting'
+            self.inflator.reset()
+            # The close code of the last connection must not decide the next attempt when this one fails to connect.
+            self.websocket = None
+            try:
+                session = await self.client.http.start_gateway()
+                self.websocket = await session.ws_connect(self.url)
+                await self.receiver()
+            except (aiohttp.ClientError, asyncio.TimeoutError, OSError) as e:
+                self.client.log.warning(f"Shard {self.shard_id} lost its connection: {e!r}")
+            finally:
+                self.stop_heartbeat()
+                self.state = 'disconnected'
+
+            code = self.websocket.close_code if self.websocket is not None else None
+            if self.closing or not self.reconnect:
+                break
+            if code in self.FATAL_CLOSE_CODES:
+                raise ConnectionClosed(code, self.shard_id)
+            if code in self.SESSION_CLOSE_CODES:
+                self.session_id = None
+
+            self.attempts += 1
+            if self.attempts >= self.RESUME_ATTEMPTS and self.session_id is not None and self.resume_gateway_url:
+                self.client.log.warning(f"Shard {self.shard_id} can't reach its resume url, identifying on {self.GATEWAY}")
+                self.session_id = None
+                self.resume_gateway_url = None
 
-        self.session = aiohttp.ClientSession(loop=self.loop)
-        self.websocket = await self.session.ws_connect(self.gateway)
+            delay = min(60, 2 ** self.attempts) * random.random()
+            self.client.log.info(f"Shard {self.shard_id} reconnecting in {delay:.2f}s (close code {code})")
+            try:
+                await asyncio.wait_for(self.closed.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
 
-        await self.receiver()
+    async def close(self):
+        self.closing = True
+        if self.closed is not None:
+            self.closed.set()
+        self.stop_heartbeat()
+        if self.websocket is not None and not self.websocket.closed:
+            await self.websocket.close()
+        self.state = 'disconnected'
+
+    async def reconnect_session(self):
+        """
+            Closes the connection without ending the session, so the connect loop resumes it.
+        """
+        if self.websocket is not None and not self.websocket.closed:
+            await self.websocket.close(code=4000)
 
     async def send(self, op: int, data: dict):
-        await self.websocket.send_json({
+        payload = self.payload_codec.dumps({
             "op": op,
             "d": data
         })
+        if isinstance(payload, bytes):
+            await self.websocket.send_bytes(payload)
+        else:
+            await self.websocket.send_str(payload)
 
     async def handle_ready(self, data: typing.Dict[str,typing.Any]):
         self.client.user = User(self.client, data["user"])
-        self.client.unavailable_guilds = [int(guild['id']) for guild in data['guilds']]
+        unavailable_guilds = set(self.client.unavailable_guilds)
+        unavailable_guilds.update(int(guild['id']) for guild in data['guilds'])
+        self.client.unavailable_guilds[:] = unavailable_guilds
         self.session_id = data['session_id']
+        self.resume_gateway_url = data.get('resume_gateway_url')
+        self.state = 'ready'
+        self.attempts = 0
+
+        await self.client.shards.shard_ready(self)
+
+    async def handle_resumed(self, data: typing.Dict[str,typing.Any]):
+        self.state = 'ready'
+        self.attempts = 0
+        self.client.log.info(f"Shard {self.shard_id} resumed its session")
+
+        await self.client.emit('resumed', self.shard_id)
+
+    async def handle_members_chunk(self, data: typing.Dict[str,typing.Any]):
+        # The chunks of a request are always handled, for the request to get them.
+        args = await self.run_parser('guild_members_chunk', self.parse_guild_members_chunk, data)
+        if args is None:
+            return
+        guild, members = args
 
-        await self.client.emit('ready')
+        if 'guild_members_chunk' in self.client.events:
+            await self.client.emit('guild_members_chunk', guild, members)
+        request = self.client.shards.member_requests.get(data.get('nonce'))
+        if request is not None:
+            request.feed(data, members)
 
     async def receive(self, message: typing.Union[str,bytes]):
         if message['op'] == Packets.Hello:
-            await self.identify(message['d']['heartbeat_interval'])
+            self.heartbeat.start(message['d']['heartbeat_interval']/1000)
+            if self.session_id is not None:
+                await self.resume()
+            else:
+                self.identifier = asyncio.ensure_future(self.identify())
 
         elif message['op'] == Packets.Dispatch:
             if message['s'] > self.seq:
                 self.seq = message['s']
 
-            self.client.log.info(f"{message['t'].lower()} has been received")
-
-            await self.dispatcher(message['t'].lower(), message['d'])
-
-    async def dispatcher(self, event: str, data: typing.Dict[str,DataType]):
-        if event in ("ready"):
-            await self.handle_ready(data)
-        elif event in ("message_create"):
-            await self.client.emit(event, 
-                Message(self.client, data))
-        elif event in ("message_update"):
-            before = self.client.get_message(data['id'])
-            await self.client.emit(event, 
-                before,Message(self.client, data))
-        elif event in ("guild_create","guild_update"):
-            await self.client.emit(event, 
-                Guild(self.client, data))
-        elif event in ("channel_create", "channel_update", "channel_delete", "thread_create", "thread_update"):
-            await self.client.emit(event, 
-                deserialize_channel(self.client, data.get('guild_id',None), data))
-        elif event in ("guild_member_add"):
-            guild = self.client.get_guild(data['guild_id'])
-            await self.client.emit(event, 
-                guild, Member(self.client,data['guild_id'],data['user'], data))
-        elif event in ("guild_member_update"):
-            guild = self.client.get_guild(data['guild_id'])
-            before = guild.get_member(data['user']['id'])
-            await self.client.emit(event, 
-                guild, before, Member(self.client,data['guild_id'],data['user'], data))
-        elif event in ("guild_role_create"):
-            guild = self.client.get_guild(data['guild_id'])
-            await self.client.emit(event, 
-                guild,Role(self.client, data['guild_id'], data['role']))
-        elif event in ("guild_role_update"):
-            guild = self.client.get_guild(data['guild_id'])
-            before = guild.get_role(data['role']['id'])
-            await self.client.emit(event, 
-                guild,before, Role(self.client, data['guild_id'], data['role']))
-        elif event in ("guild_ban_add","guild_ban_remove"):
-            guild = await self.client.get_guild(data['guild_id'])
-            await self.client.emit(event, 
-                guild, User(self.client, data['user']))
-        elif event in ("voice_state_update"):
-            guild = self.client.get_guild(data['guild_id'])
-            await self.client.emit(event, 
-                guild, VoiceServer(self.client, data))
-        
-        # Delete Events
-        elif event in ("guild_delete"):
-            guild = await self.client.get_guild(data['id'])
-            await self.client.emit(event, 
-                guild)
-        elif event in ("channel_delete"):
-            channel = await self.client.get_channel(data['id'])
-            await self.client.emit(event, 
-                channel)
-        elif event in ("guild_member_remove"):
-            guild = self.client.get_guild(data['guild_id'])
-            member = guild.get_member(data['user']['id'])
-            await self.client.emit(event, 
-                guild, member)
-        elif event in ("guild_role_delete"):
-            guild = self.client.get_guild(data['guild_id'])
-            role = guild.get_role(data['role_id'])
-            await self.client.emit(event, 
-                guild, role)
-        elif event in ("message_reaction_add", "message_reaction_remove"):
-            message = self.client.get_message(data['message_id'])
-            await self.client.emit(event, 
-                message, Reaction(self.client, data))
-        else:
+            # Most events of a big bot, like TYPING_START and PRESENCE_UPDATE, have no callbacks
+            # and no cache handler, they are dropped before anything else is done with them.
+            name = message['t']
+            if name not in self.HANDLED_EVENTS and not self.client.listening(name) and (
+                self.client.cluster is None or name not in self.client.cluster.forwarded
+            ):
+                return
+
+            event = name.lower()
+            self.client.log.debug("%s has been received", event)
+            await self.dispatcher(event, message['d'])
+
+            if self.client.cluster is not None and event in self.client.cluster.forward_events:
+                await self.client.cluster.publish(event, message['d'])
+
+        elif message['op'] == Packets.Reconnect:
+            self.client.log.info(f"Shard {self.shard_id} was asked to reconnect")
+            await self.reconnect_session()
+
+        elif message['op'] == Packets.InvalidSession:
+            if message['d']:
+                await self.reconnect_session()
+            else:
+                self.session_id = None
+                self.identifier = asyncio.ensure_future(self.identify(delay=random.uniform(1, 5)))
+
+        elif message['op'] == Packets.HeartbeatACK:
+            self.heartbeat.ack()
+
+        elif message['op'] == Packets.Heartbeat:
+            await self.heartbeat.beat()
+
+    async def dispatcher(self, event: str, data: typing.Dict[str,typing.Any]):
+        handler = self.handlers.get(event)
+        if handler is not None:
+            return await handler(data)
+
+        raw = self.RAW_EVENTS.get(event)
+        if raw is not None:
+            await self.client.emit(raw, data)
+
+        if event not in self.client.events:
+            return
+
+        parser = self.parsers.get(event)
+        if parser is None:
             await self.client.emit(event, data)
+            return
+        args = await self.run_parser(event, parser, data)
+        if args is not None:
+            await self.client.emit(event, *args)
+
+    async def run_parser(
+        self,
+        event: str,
+        parser: typing.Callable[[typing.Dict[str,typing.Any]], typing.Optional[tuple]],
+        data: typing.Dict[str,typing.Any],
+    ) -> typing.Optional[tuple]:
+        """
+            Runs the parser of an event. A payload the parser can't handle is logged and emitted
+            as `error` with the event name, like a failing callback, and the shard keeps receiving.
+
+            Parameters
+            ----------
+            event: str
+                The name of the event.
+            parser: typing.Callable
+                The parser.
+            data: dict
+                The data of the event.
+        """
+        try:
+            return parser(data)
+        except Exception as e:
+            self.client.log.exception(f"Shard {self.shard_id} failed parsing {event}")
+            await self.client.emit('error', event, e)
+            return None
+
+    # Parsers, they turn the data of an event into the arguments of its callbacks,
+    # or return None when the event can't be parsed and only its raw event is emitted.
+
+    def parse_message_create(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (Message(self.client, data),)
+
+    def parse_message_update(self, data: typing.Dict[str,typing.Any]) -> typing.Optional[tuple]:
+        # Updates like embeds being resolved only have some fields of the message.
+        if 'author' not in data:
+            return None
+        return (self.client.get_message(data['id']), Message(self.client, data))
+
+    def parse_message_delete(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (self.client.get_message(data['id']),)
+
+    def parse_message_reaction_add(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (self.client.get_message(data['message_id']), Reaction(self.client, data))
+
+    parse_message_reaction_remove = parse_message_reaction_add
+
+    def parse_guild_create(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (Guild(self.client, data),)
+
+    def parse_guild_update(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (self.client.get_guild(data['id']), Guild(self.client, data))
+
+    def parse_guild_delete(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (self.client.get_guild(data['id']),)
+
+    # The channels of the types `deserialize_channel` doesn't model, like news or forum channels, are not parsed.
+
+    def parse_channel_create(self, data: typing.Dict[str,typing.Any]) -> typing.Optional[tuple]:
+        channel = deserialize_channel(self.client, data.get('guild_id',None), data)
+        if channel is None:
+            return None
+        return (channel,)
+
+    parse_thread_create = parse_channel_create
+    parse_thread_update = parse_channel_create
+
+    def parse_channel_update(self, data: typing.Dict[str,typing.Any]) -> typing.Optional[tuple]:
+        channel = deserialize_channel(self.client, data.get('guild_id',None), data)
+        if channel is None:
+            return None
+        return (self.client.get_channel(data['id']), channel)
+
+    def parse_channel_delete(self, data: typing.Dict[str,typing.Any]) -> typing.Optional[tuple]:
+        channel = self.client.get_channel(data['id'])
+        if channel is None:
+            channel = deserialize_channel(self.client, data.get('guild_id',None), data)
+        if channel is None:
+            return None
+        return (channel,)
+
+    def parse_guild_member_add(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (self.client.get_guild(data['guild_id']), Member(self.client,data['guild_id'],data['user'], data))
+
+    def parse_guild_member_update(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        guild = self.client.get_guild(data['guild_id'])
+        before = guild.get_member(data['user']['id']) if guild is not None else None
+        return (guild, before, Member(self.client,data['guild_id'],User(self.client, data['user']), data))
+
+    def parse_guild_members_chunk(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        # The members of the chunks that no request waits for, like the ones of `chunk_guilds`,
+        # are filtered by the members cache policy.
+        guild = self.client.get_guild(data['guild_id'])
+        request = self.client.shards.member_requests.get(data.get('nonce'))
+        wanted = guild.wanted_members(data) if guild is not None and request is None else None
+        members = [
+            Member(self.client, data['guild_id'], member['user'], member) for member in data.get('members', [])
+            if wanted is None or int(member['user']['id']) in wanted
+        ]
+        return (guild, members)
+
+    def parse_guild_member_remove(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        guild = self.client.get_guild(data['guild_id'])
+        return (guild, guild.get_member(data['user']['id']) if guild is not None else None)
+
+    def parse_guild_role_create(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (self.client.get_guild(data['guild_id']), Role(self.client, data['guild_id'], data['role']))
+
+    def parse_guild_role_update(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        guild = self.client.get_guild(data['guild_id'])
+        before = guild.get_role(data['role']['id']) if guild is not None else None
+        return (guild, before, Role(self.client, data['guild_id'], data['role']))
+
+    def parse_guild_role_delete(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        guild = self.client.get_guild(data['guild_id'])
+        return (guild, guild.get_role(data['role_id']) if guild is not None else None)
+
+    def parse_guild_ban_add(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (self.client.get_guild(data['guild_id']), User(self.client, data['user']))
+
+    parse_guild_ban_remove = parse_guild_ban_add
+
+    def parse_guild_emojis_update(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (
+            self.client.get_guild(data['guild_id']),
+            [Emoji(self.client, snowflake(data['guild_id']), emoji) for emoji in data['emojis']],
+        )
+
+    def parse_guild_stickers_update(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (
+            self.client.get_guild(data['guild_id']),
+            [Sticker(self.client, snowflake(data['guild_id']), sticker) for sticker in data['stickers']],
+        )
+
+    def parse_voice_state_update(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (self.client.get_guild(data['guild_id']), VoiceState(self.client, data['guild_id'], data))
+
+    def parse_voice_server_update(self, data: typing.Dict[str,typing.Any]) -> tuple:
+        return (self.client.get_guild(data['guild_id']), VoiceServer(self.client, data))
         
     async def receiver(self):
         async for msg in self.websocket:
-            if msg.type == aiohttp.WSMsgType.BINARY or aiohttp.WSMsgType.TEXT:
-                self.buffer.extend(msg.data)
-
-                if len(msg.data) < 4 or msg.data[-4:] != b'\x00\x00\xff\xff':
-                    return
-
-                data = self.inflator.decompress(self.buffer)
-                self.buffer.clear()
+            if msg.type == aiohttp.WSMsgType.BINARY:
+                data = self.inflator.feed(msg.data)
+                if data is None:
+                    continue
+            elif msg.type == aiohttp.WSMsgType.TEXT:
+                data = msg.data
+            else:
+                continue
 
-                json_data = json.loads(data.decode('utf-8'))
+            await self.receive(self.payload_codec.loads(data))
 
-                await self.receive(json_data)
+    async def identify(self, delay: float = 0.0):
+        if delay:
+            await asyncio.sleep(delay)
+        await self.client.shards.wait_identify(self)
 
-    async def identify(self, interval: float):
+        self.seq = 0
         await self.send(Packets.Identify, {
             "token": self.client.token,
             "properties": {
@@ -175,18 +571,67 @@ class Gateway:
                 "device": "Pylemon"
             },
             "intents": self.client.intents,
-            "compress": True,
+            "compress": False,
             "large_threshold": 250,
+            "shard": [self.shard_id, self.shard_count],
         })
+        self.state = 'identifying'
 
-        self.client.log.info(f"Identifying sent")
+        self.client.log.info(f"Identifying sent for shard {self.shard_id}")
 
-        asyncio.run_coroutine_threadsafe(
-            self.heartbeat_task(interval/1000),self.loop
-        )
+    async def resume(self):
+        await self.send(Packets.Resume, {
+            "token": self.client.token,
+            "session_id": self.session_id,
+            "seq": self.seq,
+        })
+        self.state = 'resuming'
+
+        self.client.log.info(f"Resuming shard {self.shard_id} from {self.seq}")
+
+    async def request_members(
+        self,
+        guild_id: int,
+        query: str = '',
+        limit: int = 0,
+        presences: bool = False,
+        user_ids: typing.Optional[typing.List[int]] = None,
+        nonce: typing.Optional[str] = None,
+    ):
+        """
+            Asks for the members of a guild on this shard, discord answers with `guild_members_chunk` events.
+            Every member is sent for an empty query and no limit, which needs the `GUILD_MEMBERS` intent.
+
+            Parameters
+            ----------
+            guild_id: int
+                The id of the guild.
+            query: str
+                The start of the usernames to match.
+            limit: int
+                The maximum number of members, 0 for no limit.
+            presences: bool
+                Whether to send the presences of the members, needs the `GUILD_PRESENCES` intent.
+            user_ids: list
+                The ids of the members to get instead of a query.
+            nonce: str
+                Sent back in the chunks of this request.
+        """
+        data = {
+            "guild_id": str(guild_id),
+            "limit": limit,
+            "presences": presences,
+        }
+        if user_ids is not None:
+            data["user_ids"] = [str(user_id) for user_id in user_ids]
+        else:
+            data["query"] = query
+        if nonce is not None:
+            data["nonce"] = nonce
+        await self.send(Packets.RequestGuildMembers, data)
 
-    async def heartbeat_task(self, interval: float):
-        while True:
-            await self.send(1, self.seq)
-            self.client.log.info(f"Sending heartbeat")
-            await asyncio.sleep(interval)
\ No newline at end of file
+    def stop_heartbeat(self):
+        self.heartbeat.stop()
+        if self.identifier is not None:
+            self.identifier.cancel()
+            self.identifier = None
@@ -3,69 +3,612 @@ r"""
     :license: MIT, see LICENSE for more details.
 """
 
+import sys
+import time
+import random
+import string
 import typing
 import aiohttp
 import asyncio
+import collections
 
 if typing.TYPE_CHECKING:
     from pylemon.client import BaseClient
 
+from pylemon.errors import HTTPException, Forbidden, NotFound, DiscordServerError
+from pylemon.ratelimit import GlobalRateLimit, RateLimitBackend, MemoryRateLimitBackend
+
 class Route:
+    """
+        A request to a discord endpoint, kept as the path template plus the values filled into it.
+        Templates are interned and compiled once, so classifying a route for rate limits,
+        metrics or caching doesn't build any new strings from the template on every call.
+
+        Parameters
+        ----------
+        path: str
+            The path template, like `/channels/{channel_id}/messages`.
+        method: str
+            The http method.
+        params:
+            The values of the template fields.
+
+        Attributes
+        ----------
+        endpoint : str
+            The method and path template, like `GET /channels/{channel_id}/messages`.
+        major_parameters : str
+            The values of the major parameters discord buckets the route by.
+    """
+    BASE: str = 'https://discord.com/api/v9'
+    MAJOR_PARAMETERS: typing.Tuple[str, ...] = ('channel_id', 'guild_id', 'webhook_id', 'webhook_token')
+
+    _templates: typing.Dict[str, typing.Dict[str, typing.Tuple[str, str, typing.Tuple[str, ...]]]] = {}
+
+    __slots__ = ('path', 'method', 'params', 'endpoint', 'major_parameters', '_url', '_bucket', '_hash')
+
     def __init__(
         self,
-        url: str,
+        path: str,
         method: str,
+        **params: typing.Any,
     ) -> None:
-        self.url =  f'https://discord.com/api/v9{url}'
+        templates = self._templates.get(method)
+        if templates is None:
+            templates = self._templates[sys.intern(method)] = {}
+
+        template = templates.get(path)
+        if template is None:
+            template = templates[path] = self._compile(path, method)
+
+        self.path, self.endpoint, majors = template
         self.method = method
+        self.params = params
+        self.major_parameters: str = ':'.join([str(params[name]) for name in majors]) if majors else ''
+
+        self._url: typing.Optional[str] = None
+        self._bucket: typing.Optional[str] = None
+        self._hash: typing.Optional[int] = None
+
+    @classmethod
+    def _compile(cls, path: str, method: str) -> typing.Tuple[str, str, typing.Tuple[str, ...]]:
+        fields = {field for _, field, _, _ in string.Formatter().parse(path) if field}
+        return (
+            sys.intern(path),
+            sys.intern(f'{method} {path}'),
+            tuple(name for name in cls.MAJOR_PARAMETERS if name in fields),
+        )
+
+    @property
+    def url(self) -> str:
+        """
+            The full url of the route.
+        """
+        if self._url is None:
+            self._url = self.BASE + (self.path.format_map(self.params) if self.params else self.path)
+        return self._url
+
+    @property
+    def bucket(self) -> str:
+        """
+            The local bucket key of the route, used until discord tells us the real bucket.
+        """
+        if self._bucket is None:
+            self._bucket = f'{self.endpoint}:{self.major_parameters}'
+        return self._bucket
+
+    def __hash__(self) -> int:
+        if self._hash is None:
+            self._hash = hash((self.endpoint, self.major_parameters))
+        return self._hash
+
+    def __eq__(self, other: object) -> bool:
+        return (
+            isinstance(other, Route)
+            and self.endpoint is other.endpoint
+            and self.params == other.params
+        )
+
+    def __repr__(self) -> str:
+        return f'<Route {self.endpoint} {self.params}>'
+
+class RetryPolicy:
+    """
+        Decides when a failed request is retried and how long to wait before it.
+        Idempotent requests are retried on 5xx, timeouts and dropped connections, any request is
+        retried when the connection failed before it was sent. Waits grow exponentially with full
+        jitter and every request has a deadline.
+
+        Retries are paid from a shared budget that refills by `budget_ratio` for every request,
+        so a discord outage produces a bounded number of extra requests instead of a retry storm.
+
+        Parameters
+        ----------
+        max_retries: int
+            The maximum number of retries of one request.
+        base: float
+            The wait before the first retry, before jitter.
+        cap: float
+            The maximum wait between two retries.
+        timeout: float
+            The timeout of one attempt.
+        deadline: float
+            The maximum time one request can take with all of its retries.
+        budget: float
+            The maximum number of retries that can be spent in a burst.
+        budget_ratio: float
+            The fraction of a retry every request adds to the budget.
+    """
+    IDEMPOTENT_METHODS = frozenset(('GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'))
+
+    def __init__(
+        self,
+        max_retries: int = 3,
+        base: float = 0.5,
+        cap: float = 10.0,
+        timeout: float = 15.0,
+        deadline: float = 30.0,
+        budget: float = 10.0,
+        budget_ratio: float = 0.1,
+    ) -> None:
+        self.max_retries = max_retries
+        self.base = base
+        self.cap = cap
+        self.timeout = timeout
+        self.deadline = deadline
+        self.max_budget = budget
+        self.budget_ratio = budget_ratio
+
+        self.budget: float = budget
+
+    def deposit(self) -> None:
+        """
+            Adds the share of a new request to the retry budget.
+        """
+        self.budget = min(self.max_budget, self.budget + self.budget_ratio)
+
+    def should_retry(
+        self,
+        route: Route,
+        attempt: int,
+        time_left: float,
+        *,
+        sent: bool = True,
+    ) -> bool:
+        """
+            Checks whether a failed attempt should be retried, taking a retry from the budget if so.
+
+            Parameters
+            ----------
+            route: Route
+                The route of the request.
+            attempt: int
+                The number of retries already done.
+            time_left: float
+                The time left before the deadline of the request.
+            sent: bool
+                Whether the request may have reached discord.
+        """
+        if attempt >= self.max_retries or time_left <= 0 or self.budget < 1:
+            return False
+        if sent and route.method not in self.IDEMPOTENT_METHODS:
+            return False
+
+        self.budget -= 1
+        return True
+
+    def backoff(self, attempt: int, time_left: float) -> float:
+        """
+            Returns the wait before the next retry.
+
+            Parameters
+            ----------
+            attempt: int
+                The number of retries already done.
+            time_left: float
+                The time left before the deadline of the request.
+        """
+        return min(random.uniform(0, min(self.cap, self.base * 2 ** attempt)), max(time_left, 0))
+
+class ResponseCache:
+    """
+        A ttl and lru bounded cache of GET responses for endpoints that rarely change.
+        Only the path templates listed in `ttls` are cached, each with its own ttl. Entries are
+        dropped when a write goes to the same resource, or when the gateway tells us it changed.
+
+        Cached responses are shared between callers and must not be mutated.
+
+        Parameters
+        ----------
+        ttls: dict
+            The ttl in seconds of every cached path template.
+        maxsize: int
+            The maximum number of cached responses.
+    """
+    DEFAULT_TTLS: typing.Dict[str, float] = {
+        '/guilds/{guild_id}/roles': 300.0,
+        '/guilds/{guild_id}/emojis': 300.0,
+        '/guilds/{guild_id}/stickers': 300.0,
+        '/channels/{channel_id}/webhooks': 300.0,
+        '/channels/{channel_id}/invites': 60.0,
+    }
+
+    def __init__(
+        self,
+        ttls: typing.Optional[typing.Dict[str, float]] = None,
+        maxsize: int = 1024,
+    ) -> None:
+        self.ttls = self.DEFAULT_TTLS if ttls is None else ttls
+        self.maxsize = maxsize
+
+        self.entries: "collections.OrderedDict[tuple, typing.Tuple[float, typing.Any]]" = collections.OrderedDict()
+        self.resources: typing.Dict[typing.Tuple[str, str], typing.Set[tuple]] = {}
+        self.writes: typing.Dict[str, typing.Tuple[str, ...]] = {}
+
+    def get(self, key: typing.Tuple[Route, typing.Optional[tuple]]) -> typing.Any:
+        """
+            Gets a cached response, returns None if there is no fresh one.
+
+            Parameters
+            ----------
+            key: tuple
+                The route and the query params of the request.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] < time.monotonic():
+            self.remove(key)
+            return None
+
+        self.entries.move_to_end(key)
+        return entry[1]
+
+    def set(self, key: typing.Tuple[Route, typing.Optional[tuple]], data: typing.Any) -> None:
+        """
+            Caches a response if its route is cacheable.
+
+            Parameters
+            ----------
+            key: tuple
+                The route and the query params of the request.
+            data: typing.Any
+                The response.
+        """
+        route = key[0]
+        ttl = self.ttls.get(route.path)
+        if ttl is None:
+            return
+
+        self.entries[key] = (time.monotonic() + ttl, data)
+        self.entries.move_to_end(key)
+        self.resources.setdefault((route.path, route.major_parameters), set()).add(key)
+
+        while len(self.entries) > self.maxsize:
+            self.remove(next(iter(self.entries)))
+
+    def remove(self, key: typing.Tuple[Route, typing.Optional[tuple]]) -> None:
+        route = key[0]
+        self.entries.pop(key, None)
+
+        keys = self.resources.get((route.path, route.major_parameters))
+        if keys is not None:
+            keys.discard(key)
+            if not keys:
+                del self.resources[(route.path, route.major_parameters)]
+
+    def invalidate(self, path: str, **params: typing.Any) -> None:
+        """
+            Drops every cached response of a path template and major parameters.
+
+            Parameters
+            ----------
+            path: str
+                The path template, like `/guilds/{guild_id}/roles`.
+            params:
+                The major parameters, like `guild_id`.
+        """
+        route = Route(path, 'GET', **params)
+        for key in tuple(self.resources.get((route.path, route.major_parameters), ())):
+            self.remove(key)
+
+    def written(self, route: Route) -> None:
+        """
+            Drops the cached responses a successful write to `route` made stale,
+            that is every cached template the written path starts with.
+
+            Parameters
+            ----------
+            route: Route
+                The route that was written to.
+        """
+        paths = self.writes.get(route.path)
+        if paths is None:
+            paths = self.writes[route.path] = tuple(path for path in self.ttls if route.path.startswith(path))
+
+        for path in paths:
+            # The cached template has its own major parameters, `DELETE /channels/{channel_id}/webhooks/{webhook_id}`
+            # is keyed by the channel and the webhook while the cached list is keyed by the channel only.
+            major_parameters = Route(path, 'GET', **route.params).major_parameters
+            for key in tuple(self.resources.get((path, major_parameters), ())):
+                self.remove(key)
+
+    def clear(self) -> None:
+        """
+            Drops every cached response.
+        """
+        self.entries.clear()
+        self.resources.clear()
 
 class HTTP:
     def __init__(
         self,
         client: "BaseClient",
+        max_ratelimit_retries: int = 5,
+        global_rate_limit: typing.Optional[int] = None,
+        ratelimiter: typing.Optional[RateLimitBackend] = None,
+        retry_policy: typing.Optional[RetryPolicy] = None,
+        connection_limit: int = 100,
+        connection_limit_per_host: int = 0,
+        keepalive_timeout: float = 30.0,
+        dns_cache_ttl: int = 300,
+        coalesce: bool = True,
+        cache: typing.Optional[ResponseCache] = None,
     ) -> None:
         self.client = client
-        self.session = aiohttp.ClientSession(loop=self.client.loop)
         self.headers = {
             'Authorization': self.client.token,
         }
+        self.max_ratelimit_retries = max_ratelimit_retries
+        self.retry_policy = retry_policy or RetryPolicy()
+
+        self.ratelimiter: RateLimitBackend = ratelimiter or MemoryRateLimitBackend(
+            GlobalRateLimit.for_token(self.client.token, global_rate_limit)
+        )
+        self.bucket_hashes: typing.Dict[str, str] = {}
+
+        self.coalesce = coalesce
+        self.cache = cache
+        self.inflight: typing.Dict[typing.Tuple[Route, typing.Optional[tuple]], asyncio.Future] = {}
+
+        self.connection_limit = connection_limit
+        self.connection_limit_per_host = connection_limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.dns_cache_ttl = dns_cache_ttl
+
+        self.connector: typing.Optional[aiohttp.TCPConnector] = None
+        self.session: typing.Optional[aiohttp.ClientSession] = None
+        self.gateway_session: typing.Optional[aiohttp.ClientSession] = None
+
+    async def start(self) -> aiohttp.ClientSession:
+        """
+            Creates the connection pool and the session of the rest api the first time they are needed.
+            Connections are kept alive so bursts of requests reuse warm tls connections,
+            and aiohttp sets TCP_NODELAY on them.
+        """
+        if self.session is None or self.session.closed:
+            self.connector = aiohttp.TCPConnector(
+                limit=self.connection_limit,
+                limit_per_host=self.connection_limit_per_host,
+                keepalive_timeout=self.keepalive_timeout,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self.session = aiohttp.ClientSession(connector=self.connector)
+        return self.session
+
+    async def start_gateway(self) -> aiohttp.ClientSession:
+        """
+            Creates the session the gateway websockets are opened with the first time it is needed.
+            A websocket holds its connection for as long as it is open, so the shards get their own
+            pool without a limit instead of taking the connections of the rest api.
+        """
+        if self.gateway_session is None or self.gateway_session.closed:
+            connector = aiohttp.TCPConnector(
+                limit=0,
+                use_dns_cache=True,
+                ttl_dns_cache=self.dns_cache_ttl,
+            )
+            self.gateway_session = aiohttp.ClientSession(connector=connector)
+        return self.gateway_session
+
+    async def close(self) -> None:
+        """
+            Closes the sessions, their pooled connections and the rate limit backend.
+        """
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+        if self.gateway_session is not None and not self.gateway_session.closed:
+            await self.gateway_session.close()
+        await self.ratelimiter.close()
+
+    def get_bucket(self, route: Route) -> str:
+        """
+            Gets the bucket key of a route, using discord's bucket hash once we have seen it.
+
+            Parameters
+            ----------
+            route: Route
+                The route to get the bucket of.
+        """
+        bucket_hash = self.bucket_hashes.get(route.endpoint)
+        return f'{bucket_hash}:{route.major_parameters}' if bucket_hash else route.bucket
 
     async def request(
         self,
         route: Route,
         **kwargs,
     ) -> typing.Any:
-        if 'headers' in kwargs and kwargs['headers']:
-            for k, v in kwargs['headers'].items():
-                self.headers[k] = v
-
-        async with self.session.request(
-            url=route.url,
-            method=route.method,
-            headers=self.headers,
-            **kwargs,
-        ) as response:
-            if response.status == 429:
-                await self.ratelimit(response.headers['Retry-After'])
-            return await response.json()
+        """
+            Sends a request to discord.
+            Identical GET requests sent while one is already in flight wait for it and share its
+            response instead of being sent again, and with a `ResponseCache` fresh responses of
+            cacheable routes are served from it, so callers must not mutate what they get back.
 
-    async def ratelimit(
+            Parameters
+            ----------
+            route: Route
+                The route to request.
+            kwargs:
+                The extra parameters of `aiohttp.ClientSession.request`.
+        """
+        if route.method != 'GET' or kwargs.keys() - {'params'}:
+            data = await self._request(route, **kwargs)
+            if self.cache is not None and route.method != 'GET':
+                self.cache.written(route)
+            return data
+
+        params = kwargs.get('params')
+        key = (route, tuple(sorted(params.items())) if params else None)
+
+        if self.cache is not None:
+            data = self.cache.get(key)
+            if data is not None:
+                return data
+
+        if not self.coalesce:
+            data = await self._request(route, **kwargs)
+        else:
+            future = self.inflight.get(key)
+            if future is None:
+                future = self.inflight[key] = asyncio.ensure_future(self._request(route, **kwargs))
+                future.add_done_callback(lambda _: self.inflight.pop(key, None))
+            data = await asyncio.shield(future)
+
+        if self.cache is not None:
+            self.cache.set(key, data)
+        return data
+
+    async def _request(
         self,
-        retry_after: float,
         route: Route,
-        *,
-        params: typing.Optional[typing.Dict[str, str]] = {},
-        data: typing.Optional[typing.Dict[str, str]] = {},
-        json: typing.Optional[typing.Dict[str, str]] = {},
-    ):
-        await asyncio.sleep(retry_after if type(retry_after) == float else float(retry_after))
-        return await self.request(
-            route,
-            params=params,
-            data=data,
-            json=json,
-        )
+        **kwargs,
+    ) -> typing.Any:
+        headers = self.headers
+        if kwargs.get('headers'):
+            headers = {**self.headers, **kwargs['headers']}
+        kwargs.pop('headers', None)
+
+        session = await self.start()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.retry_policy.deadline
+        self.retry_policy.deposit()
+
+        ratelimited = 0
+        attempt = 0
+        while True:
+            bucket = self.get_bucket(route)
+            await self.ratelimiter.acquire(bucket)
+
+            try:
+                async with session.request(
+                    url=route.url,
+                    method=route.method,
+                    headers=headers,
+                    timeout=aiohttp.ClientTimeout(total=min(self.retry_policy.timeout, max(deadline - loop.time(), 0.1))),
+                    **kwargs,
+                ) as response:
+                    bucket_hash = response.headers.get('X-RateLimit-Bucket')
+                    buckets = [bucket]
+                    if bucket_hash and self.bucket_hashes.get(route.endpoint) != bucket_hash:
+                        self.bucket_hashes[route.endpoint] = bucket_hash
+                        bucket = self.get_bucket(route)
+                        buckets.append(bucket)
+
+                    limits = (None, None, None)
+                    if 'X-RateLimit-Remaining' in response.headers:
+                        limits = (
+                            int(response.headers.get('X-RateLimit-Limit', 0)) or None,
+                            int(response.headers['X-RateLimit-Remaining']),
+                            float(response.headers.get('X-RateLimit-Reset-After', 0)),
+                        )
+                    # The bucket we acquired is updated too, so the requests waiting on it learn its limits.
+                    for key in buckets:
+                        await self.ratelimiter.update(key, *limits)
+
+                    data = await self.read(response)
+                    if 200 <= response.status < 300:
+                        return data
+
+                    if response.status == 429 and ratelimited < self.max_ratelimit_retries:
+                        ratelimited += 1
+                        await self.ratelimit(
+                            bucket,
+                            float(response.headers.get('Retry-After', 1)),
+                            is_global='X-RateLimit-Global' in response.headers,
+                        )
+                        continue
 
+                    if response.status < 500 or not self.retry_policy.should_retry(route, attempt, deadline - loop.time()):
+                        raise self.error(response.status, data)
+                    self.client.log.warning(f"{route.endpoint} failed with {response.status}, retrying")
 
+            except (aiohttp.ClientConnectionError, asyncio.TimeoutError) as e:
+                sent = not isinstance(e, aiohttp.ClientConnectorError)
+                if not self.retry_policy.should_retry(route, attempt, deadline - loop.time(), sent=sent):
+                    raise
+                self.client.log.warning(f"{route.endpoint} failed with {e!r}, retrying")
+
+            await asyncio.sleep(self.retry_policy.backoff(attempt, deadline - loop.time()))
+            attempt += 1
+
+    async def read(self, response: aiohttp.ClientResponse) -> typing.Any:
+        """
+            Reads the body of a response, decoding it if it is json.
+
+            Parameters
+            ----------
+            response: aiohttp.ClientResponse
+                The response to read.
+        """
+        body = await response.read()
+        if not body:
+            return None
+        if response.content_type == 'application/json':
+            return self.client.codec.loads(body)
+        return body.decode('utf-8', 'replace')
+
+    def error(self, status: int, data: typing.Any) -> HTTPException:
+        """
+            Builds the exception of an error response.
+
+            Parameters
+            ----------
+            status: int
+                The http status of the response.
+            data: typing.Any
+                The body of the response.
+        """
+        if status == 403:
+            return Forbidden(status, data)
+        elif status == 404:
+            return NotFound(status, data)
+        elif status >= 500:
+            return DiscordServerError(status, data)
+        return HTTPException(status, data)
+
+    async def ratelimit(
+        self,
+        bucket: str,
+        retry_after: float,
+        *,
+        is_global: bool = False,
+    ) -> None:
+        """
+            Handles a 429 by holding the bucket, or every route for a global one, closed until discord lets us retry.
 
-    
\ No newline at end of file
+            Parameters
+            ----------
+            bucket: str
+                The key of the bucket that was rate limited.
+            retry_after: float
+                The number of seconds discord asked us to wait.
+            is_global: bool
+                Whether the rate limit is the global one.
+        """
+        if is_global:
+            self.client.log.warning(f"Globally rate limited, pausing all requests for {retry_after:.2f}s")
+            await self.ratelimiter.pause(retry_after)
+        else:
+            self.client.log.warning(f"Rate limited on bucket {bucket}, retrying in {retry_after:.2f}s")
+            await self.ratelimiter.exhaust(bucket, retry_after)
@@ -0,0 +1,548 @@
+r"""
+    :copyright: (c) 2021 by Zaid Ali (email@xarty.xyz) / Hazem Meqdad(hazemmeqdad@gmail.com).
+    :license: MIT, see LICENSE for more details.
+
+    Rate limit state used by `HTTP`.
+    The state lives behind a `RateLimitBackend` so several processes running the same token
+    can share their buckets through a `RateLimitBroker`.
+"""
+
+import os
+import sys
+import json
+import time
+import typing
+import asyncio
+import itertools
+
+class Bucket:
+    """
+        A rate limit bucket shared by every request that discord groups together.
+        Requests queue on the bucket lock and wait locally for the reset instead of
+        being sent just to get a 429 back. Until the first response tells us the limits
+        of a new bucket, only one request is sent and the others wait for it.
+
+        Attributes
+        ----------
+        key : str
+            The key of the bucket.
+        limit : int
+            The number of requests the bucket allows per window.
+        remaining : int
+            The number of requests left in the current window.
+        reset_at : float
+            The monotonic time the current window resets at.
+    """
+    # How long the requests of a new bucket wait for the first response before sending another one.
+    DISCOVERY_TIMEOUT: float = 10.0
+
+    def __init__(
+        self,
+        key: str,
+    ) -> None:
+        self.key = key
+        self.lock = asyncio.Lock()
+        self.discovered = asyncio.Event()
+        self.probing = False
+
+        self.limit: typing.Optional[int] = None
+        self.remaining: typing.Optional[int] = None
+        self.reset_at: float = 0.0
+
+    async def acquire(self) -> None:
+        """
+            Waits until the bucket has room for one more request and takes it.
+        """
+        async with self.lock:
+            if not self.discovered.is_set():
+                if self.probing:
+                    try:
+                        await asyncio.wait_for(self.discovered.wait(), self.DISCOVERY_TIMEOUT)
+                    except asyncio.TimeoutError:
+                        # The first request got no response, send this one to learn the limits instead.
+                        pass
+                if not self.discovered.is_set():
+                    self.probing = True
+                    return
+
+            while self.remaining == 0:
+                delay = self.reset_at - time.monotonic()
+                if delay <= 0:
+                    self.remaining = self.limit
+                    break
+                await asyncio.sleep(delay)
+
+            if self.remaining is not None:
+                self.remaining -= 1
+
+    def update(
+        self,
+        limit: typing.Optional[int],
+        remaining: typing.Optional[int],
+        reset_after: typing.Optional[float],
+    ) -> None:
+        """
+            Updates the bucket from the rate limit headers of a response.
+            A response without rate limit headers still releases the requests waiting
+            on a new bucket, the route is then not limited locally.
+
+            Parameters
+            ----------
+            limit: int
+                The value of `X-RateLimit-Limit`.
+            remaining: int
+                The value of `X-RateLimit-Remaining`.
+            reset_after: float
+                The value of `X-RateLimit-Reset-After`.
+        """
+        if limit is not None:
+            self.limit = limit
+        if remaining is not None:
+            self.remaining = remaining
+        if reset_after is not None:
+            self.reset_at = time.monotonic() + reset_after
+        self.discovered.set()
+
+    @property
+    def idle(self) -> bool:
+        """
+            Whether nothing waits on the bucket and its window has reset, so it can be forgotten.
+        """
+        return not self.lock.locked() and time.monotonic() >= self.reset_at
+
+    def exhaust(self, retry_after: float) -> None:
+        """
+            Marks the bucket as empty until `retry_after` seconds have passed.
+
+            Parameters
+            ----------
+            retry_after: float
+                The number of seconds until the bucket resets.
+        """
+        self.remaining = 0
+        self.reset_at = max(self.reset_at, time.monotonic() + retry_after)
+        self.discovered.set()
+
+class GlobalRateLimit:
+    """
+        The global rate limit gate every route passes through.
+        It is a token bucket refilled at `rate` requests per `per` seconds, and a global 429
+        pauses every sender until discord lets us continue.
+
+        There is one gate per bot token in a process, get it with `GlobalRateLimit.for_token`.
+        Processes sharing a token can split discord's budget by giving each a lower `rate`.
+
+        Attributes
+        ----------
+        rate : int
+            The number of requests allowed per `per` seconds.
+        per : float
+            The length of the window in seconds.
+    """
+    _gates: typing.Dict[str, "GlobalRateLimit"] = {}
+
+    def __init__(
+        self,
+        rate: int = 50,
+        per: float = 1.0,
+    ) -> None:
+        self.rate = rate
+        self.per = per
+
+        self.tokens: float = float(rate)
+        self.updated_at: float = time.monotonic()
+        self.paused_until: float = 0.0
+        self.lock = asyncio.Lock()
+
+    @classmethod
+    def for_token(
+        cls,
+        token: str,
+        rate: typing.Optional[int] = None,
+        per: float = 1.0,
+    ) -> "GlobalRateLimit":
+        """
+            Gets the process wide gate of a bot token, creating it the first time.
+
+            Parameters
+            ----------
+            token: str
+                The bot token.
+            rate: int
+                The number of requests allowed per `per` seconds, keeps the current rate if not given.
+            per: float
+                The length of the window in seconds.
+        """
+        gate = cls._gates.get(token)
+        if gate is None:
+            gate = cls._gates[token] = cls(rate or 50, per)
+        elif rate is not None:
+            gate.rate, gate.per = rate, per
+        return gate
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.rate, self.tokens + (now - self.updated_at) * self.rate / self.per)
+        self.updated_at = now
+
+    @property
+    def budget(self) -> float:
+        """
+            The number of requests that can be sent right now without waiting.
+        """
+        if self.paused:
+            return 0.0
+        self._refill()
+        return self.tokens
+
+    @property
+    def paused(self) -> bool:
+        """
+            Whether the gate is paused by a global 429.
+        """
+        return self.paused_until > time.monotonic()
+
+    async def acquire(self) -> None:
+        """
+            Waits until the gate is open and has a token, then takes it.
+        """
+        async with self.lock:
+            while True:
+                delay = self.paused_until - time.monotonic()
+                if delay <= 0:
+                    self._refill()
+                    if self.tokens >= 1:
+                        self.tokens -= 1
+                        return
+                    delay = (1 - self.tokens) * self.per / self.rate
+                await asyncio.sleep(delay)
+
+    def pause(self, retry_after: float) -> None:
+        """
+            Pauses every sender for `retry_after` seconds.
+
+            Parameters
+            ----------
+            retry_after: float
+                The number of seconds discord asked us to wait.
+        """
+        self.paused_until = max(self.paused_until, time.monotonic() + retry_after)
+        self.tokens = 0.0
+
+class RateLimitBackend:
+    """
+        The interface `HTTP` uses to wait on and update rate limits.
+        Subclass it to keep the buckets somewhere else.
+    """
+    async def acquire(self, key: str) -> None:
+        """
+            Waits until the bucket `key` and the global gate allow one more request, then takes it.
+
+            Parameters
+            ----------
+            key: str
+                The key of the bucket.
+        """
+        raise NotImplementedError
+
+    async def update(
+        self,
+        key: str,
+        limit: typing.Optional[int],
+        remaining: typing.Optional[int],
+        reset_after: typing.Optional[float],
+    ) -> None:
+        """
+            Updates the bucket `key` from the rate limit headers of a response.
+
+            Parameters
+            ----------
+            key: str
+                The key of the bucket.
+            limit: int
+                The value of `X-RateLimit-Limit`.
+            remaining: int
+                The value of `X-RateLimit-Remaining`.
+            reset_after: float
+                The value of `X-RateLimit-Reset-After`.
+        """
+        raise NotImplementedError
+
+    async def exhaust(self, key: str, retry_after: float) -> None:
+        """
+            Closes the bucket `key` for `retry_after` seconds after a 429.
+
+            Parameters
+            ----------
+            key: str
+                The key of the bucket.
+            retry_after: float
+                The number of seconds discord asked us to wait.
+        """
+        raise NotImplementedError
+
+    async def pause(self, retry_after: float) -> None:
+        """
+            Pauses every route for `retry_after` seconds after a global 429.
+
+            Parameters
+            ----------
+            retry_after: float
+                The number of seconds discord asked us to wait.
+        """
+        raise NotImplementedError
+
+    async def budget(self) -> float:
+        """
+            Returns the number of requests the global gate allows right now.
+        """
+        raise NotImplementedError
+
+    async def close(self) -> None:
+        """
+            Releases the resources of the backend.
+        """
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+        Keeps the buckets in this process. This is the default backend.
+        There is a bucket per route and major parameter, the idle ones are dropped whenever
+        the number of buckets doubles, so a bot touching many channels doesn't keep them all.
+
+        Parameters
+        ----------
+        global_ratelimit: GlobalRateLimit
+            The global gate to use.
+    """
+    # The number of buckets at which the idle ones are first dropped.
+    PRUNE_AT: int = 1024
+
+    def __init__(
+        self,
+        global_ratelimit: typing.Optional[GlobalRateLimit] = None,
+    ) -> None:
+        self.global_ratelimit = global_ratelimit or GlobalRateLimit()
+        self.buckets: typing.Dict[str, Bucket] = {}
+        self.prune_at = self.PRUNE_AT
+
+    def prune(self) -> None:
+        """
+            Drops the idle buckets.
+        """
+        for key in [key for key, bucket in self.buckets.items() if bucket.idle]:
+            del self.buckets[key]
+        self.prune_at = max(self.PRUNE_AT, len(self.buckets) * 2)
+
+    def get_bucket(self, key: str) -> Bucket:
+        """
+            Gets the bucket of a key, creating it the first time.
+
+            Parameters
+            ----------
+            key: str
+                The key of the bucket.
+        """
+        bucket = self.buckets.get(key)
+        if bucket is None:
+            if len(self.buckets) >= self.prune_at:
+                self.prune()
+            bucket = self.buckets[key] = Bucket(key)
+        return bucket
+
+    async def acquire(self, key: str) -> None:
+        await self.get_bucket(key).acquire()
+        await self.global_ratelimit.acquire()
+
+    async def update(
+        self,
+        key: str,
+        limit: typing.Optional[int],
+        remaining: typing.Optional[int],
+        reset_after: typing.Optional[float],
+    ) -> None:
+        self.get_bucket(key).update(limit, remaining, reset_after)
+
+    async def exhaust(self, key: str, retry_after: float) -> None:
+        self.get_bucket(key).exhaust(retry_after)
+
+    async def pause(self, retry_after: float) -> None:
+        self.global_ratelimit.pause(retry_after)
+
+    async def budget(self) -> float:
+        return self.global_ratelimit.budget
+
+class RateLimitBroker:
+    """
+        Serves one `MemoryRateLimitBackend` to every process on the host over a unix socket.
+        Run one broker per bot token, either with `await broker.start()` inside a process or
+        with `python -m pylemon.ratelimit <path> [global rate]`, then give every client a
+        `SharedRateLimitBackend` pointing to the same path.
+
+        The protocol is one json object per line, `{"id": 1, "op": "acquire", "args": [...]}`,
+        answered with `{"id": 1, "result": ...}` or `{"id": 1, "error": "..."}`.
+
+        Parameters
+        ----------
+        path: str
+            The path of the unix socket.
+        global_rate_limit: int
+            The number of requests per second every process shares.
+    """
+    OPS = ('acquire', 'update', 'exhaust', 'pause', 'budget')
+
+    def __init__(
+        self,
+        path: str,
+        global_rate_limit: int = 50,
+    ) -> None:
+        self.path = path
+        self.backend = MemoryRateLimitBackend(GlobalRateLimit(global_rate_limit))
+        self.server: typing.Optional[asyncio.AbstractServer] = None
+
+    async def start(self) -> None:
+        """
+            Starts listening on the socket.
+        """
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self.handle, path=self.path)
+
+    async def serve_forever(self) -> None:
+        """
+            Starts listening on the socket and serves until cancelled.
+        """
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self) -> None:
+        """
+            Stops the broker and removes the socket.
+        """
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        tasks = set()
+        try:
+            async for line in reader:
+                task = asyncio.ensure_future(self.call(json.loads(line), writer))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def call(self, request: typing.Dict[str, typing.Any], writer: asyncio.StreamWriter) -> None:
+        try:
+            if request['op'] not in self.OPS:
+                raise ValueError(f"unknown operation {request['op']!r}")
+            result = {'id': request['id'], 'result': await getattr(self.backend, request['op'])(*request['args'])}
+        except Exception as e:
+            result = {'id': request['id'], 'error': repr(e)}
+
+        if not writer.is_closing():
+            writer.write(json.dumps(result).encode('utf-8') + b'\n')
+
+class SharedRateLimitBackend(RateLimitBackend):
+    """
+        Draws from the buckets of a `RateLimitBroker`, so every process on the host
+        shares the same per route and global limits.
+
+        Parameters
+        ----------
+        path: str
+            The path of the broker's unix socket.
+    """
+    def __init__(
+        self,
+        path: str,
+    ) -> None:
+        self.path = path
+        self.ids = itertools.count()
+        self.waiters: typing.Dict[int, asyncio.Future] = {}
+
+        self.reader: typing.Optional[asyncio.StreamReader] = None
+        self.writer: typing.Optional[asyncio.StreamWriter] = None
+        self.listener: typing.Optional[asyncio.Task] = None
+        self.lock = asyncio.Lock()
+
+    async def connect(self) -> None:
+        """
+            Connects to the broker if we are not connected already.
+        """
+        async with self.lock:
+            if self.writer is not None and not self.writer.is_closing():
+                return
+            self.reader, self.writer = await asyncio.open_unix_connection(self.path)
+            self.listener = asyncio.ensure_future(self.listen(self.reader))
+
+    async def listen(self, reader: asyncio.StreamReader) -> None:
+        try:
+            async for line in reader:
+                response = json.loads(line)
+                waiter = self.waiters.pop(response['id'], None)
+                if waiter is None or waiter.done():
+                    continue
+                if 'error' in response:
+                    waiter.set_exception(RuntimeError(f"Rate limit broker error: {response['error']}"))
+                else:
+                    waiter.set_result(response['result'])
+        finally:
+            for waiter in self.waiters.values():
+                if not waiter.done():
+                    waiter.set_exception(ConnectionError("Lost the connection to the rate limit broker"))
+            self.waiters.clear()
+            if self.writer is not None:
+                self.writer.close()
+
+    async def call(self, op: str, *args) -> typing.Any:
+        await self.connect()
+
+        id = next(self.ids)
+        waiter = self.waiters[id] = asyncio.get_running_loop().create_future()
+        self.writer.write(json.dumps({'id': id, 'op': op, 'args': args}).encode('utf-8') + b'\n')
+        try:
+            return await waiter
+        finally:
+            self.waiters.pop(id, None)
+
+    async def acquire(self, key: str) -> None:
+        await self.call('acquire', key)
+
+    async def update(
+        self,
+        key: str,
+        limit: typing.Optional[int],
+        remaining: typing.Optional[int],
+        reset_after: typing.Optional[float],
+    ) -> None:
+        await self.call('update', key, limit, remaining, reset_after)
+
+    async def exhaust(self, key: str, retry_after: float) -> None:
+        await self.call('exhaust', key, retry_after)
+
+    async def pause(self, retry_after: float) -> None:
+        await self.call('pause', retry_after)
+
+    async def budget(self) -> float:
+        return await self.call('budget')
+
+    async def close(self) -> None:
+        if self.listener is not None:
+            self.listener.cancel()
+        if self.writer is not None:
+            self.writer.close()
+
+if __name__ == '__main__':
+    broker = RateLimitBroker(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 50)
+    try:
+        asyncio.run(broker.serve_forever())
+    except KeyboardInterrupt:
+        pass
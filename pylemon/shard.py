@@ -0,0 +1,417 @@
+r"""
+    :copyright: (c) 2021 by Zaid Ali (email@xarty.xyz) / Hazem Meqdad(hazemmeqdad@gmail.com).
+    :license: MIT, see LICENSE for more details.
+"""
+
+import time
+import typing
+import asyncio
+import itertools
+
+if typing.TYPE_CHECKING:
+    from pylemon.client import BaseClient
+    from pylemon.types import Member
+
+from pylemon.gateway import Gateway
+
+class IdentifyScheduler:
+    """
+        Spaces the IDENTIFYs of the shards so discord never rejects one.
+        Discord allows `max_concurrency` identifies per 5 seconds, one for each rate limit key
+        `shard_id % max_concurrency`, so the shards of different keys identify together and the
+        shards of the same key identify one window apart. Every identify also uses one of the
+        daily session starts, when they run out the next slot waits for them to reset.
+
+        Slots are reserved without waiting, `reserve` returns how long the shard has to wait,
+        which lets a cluster's parent process schedule the shards of every process.
+
+        Parameters
+        ----------
+        max_concurrency: int
+            The number of rate limit keys, from `session_start_limit.max_concurrency`.
+        remaining: int
+            The number of session starts left, unlimited if not given.
+        total: int
+            The number of session starts after a reset.
+        reset_after: float
+            The seconds until the session starts reset.
+        window: float
+            The seconds between two identifies of a key, a little over discord's 5 seconds so
+            jitter never puts two of them in the same window.
+    """
+    def __init__(
+        self,
+        max_concurrency: int = 1,
+        remaining: typing.Optional[int] = None,
+        total: typing.Optional[int] = None,
+        reset_after: float = 0.0,
+        window: float = 5.1,
+    ) -> None:
+        self.max_concurrency = max(max_concurrency, 1)
+        self.remaining = remaining
+        self.total = total if total is not None else remaining
+        self.reset_at = time.monotonic() + reset_after
+        self.window = window
+
+        self.next_slots: typing.Dict[int, float] = {}
+
+    @classmethod
+    def from_gateway(cls, data: typing.Dict[str, typing.Any]) -> "IdentifyScheduler":
+        """
+            Creates a scheduler from the response of `/gateway/bot`.
+
+            Parameters
+            ----------
+            data: dict
+                The response.
+        """
+        limit = data.get('session_start_limit', {})
+        return cls(
+            max_concurrency=limit.get('max_concurrency', 1),
+            remaining=limit.get('remaining'),
+            total=limit.get('total'),
+            reset_after=limit.get('reset_after', 0) / 1000,
+        )
+
+    def reserve(self, shard_id: int) -> float:
+        """
+            Reserves the next identify slot of a shard and returns the seconds to wait for it.
+
+            Parameters
+            ----------
+            shard_id: int
+                The id of the shard.
+        """
+        now = time.monotonic()
+        key = shard_id % self.max_concurrency
+        slot = max(now, self.next_slots.get(key, now))
+
+        if self.remaining is not None:
+            if slot >= self.reset_at:
+                self.remaining = self.total
+                self.reset_at = slot + 86400
+            if self.remaining <= 0:
+                slot = max(slot, self.reset_at)
+                for other in range(self.max_concurrency):
+                    self.next_slots[other] = max(self.next_slots.get(other, slot), slot)
+                self.remaining = self.total
+                self.reset_at = slot + 86400
+            self.remaining -= 1
+
+        self.next_slots[key] = slot + self.window
+        return slot - now
+
+    async def wait(self, shard_id: int) -> None:
+        """
+            Waits for the next identify slot of a shard.
+
+            Parameters
+            ----------
+            shard_id: int
+                The id of the shard.
+        """
+        delay = self.reserve(shard_id)
+        if delay > 0:
+            await asyncio.sleep(delay)
+
+class MemberRequest:
+    """
+        A request for members of a guild over the gateway, sent with a nonce so its chunks are told apart
+        from the chunks of the other requests. Iterating it sends the request and yields the members while
+        the chunks arrive, the cache is filled chunk by chunk. Awaiting it returns every member.
+
+        Parameters
+        ----------
+        manager: ShardManager
+            The shard manager of the client.
+        guild_id: int
+            The id of the guild.
+        nonce: str
+            The nonce of the request.
+        query: str
+            The start of the usernames to match.
+        limit: int
+            The maximum number of members, 0 for no limit.
+        presences: bool
+            Whether to get the presences of the members.
+        user_ids: list
+            The ids of the members to get instead of a query.
+        timeout: float
+            The seconds to wait for the next chunk before raising `asyncio.TimeoutError`.
+
+        Attributes
+        ----------
+        members : list
+            The members received so far.
+        not_found : list
+            The ids of `user_ids` that are not members of the guild.
+        done : bool
+            Whether the last chunk was received.
+    """
+    def __init__(
+        self,
+        manager: "ShardManager",
+        guild_id: int,
+        nonce: str,
+        query: str = '',
+        limit: int = 0,
+        presences: bool = False,
+        user_ids: typing.Optional[typing.List[int]] = None,
+        timeout: float = 30.0,
+    ) -> None:
+        self.manager = manager
+        self.guild_id = int(guild_id)
+        self.nonce = nonce
+        self.query = query
+        self.limit = limit
+        self.presences = presences
+        self.user_ids = user_ids
+        self.timeout = timeout
+
+        self.members: typing.List["Member"] = []
+        self.not_found: typing.List[int] = []
+        self.done = False
+        self.sent = False
+        self.chunks: asyncio.Queue = asyncio.Queue()
+
+    async def send(self) -> None:
+        """
+            Sends the request on the shard of the guild, once.
+        """
+        if self.sent:
+            return
+        shard = self.manager.get_shard(self.guild_id)
+        if shard is None:
+            raise ValueError(f"The shard of guild {self.guild_id} is not run by this client")
+
+        self.sent = True
+        self.manager.member_requests[self.nonce] = self
+        await shard.request_members(
+            self.guild_id,
+            query=self.query,
+            limit=self.limit,
+            presences=self.presences,
+            user_ids=self.user_ids,
+            nonce=self.nonce,
+        )
+
+    def feed(self, data: typing.Dict[str, typing.Any], members: typing.List["Member"]) -> None:
+        """
+            Receives a chunk of the request.
+
+            Parameters
+            ----------
+            data: dict
+                The chunk payload.
+            members: list
+                The members of the chunk.
+        """
+        self.members.extend(members)
+        self.not_found.extend(int(id) for id in data.get('not_found', []))
+        self.chunks.put_nowait(members)
+        if data.get('chunk_index', 0) + 1 >= data.get('chunk_count', 1):
+            self.finish()
+
+    def finish(self) -> None:
+        """
+            Ends the request, the iterators stop after the members they didn't yield yet.
+        """
+        self.done = True
+        self.manager.member_requests.pop(self.nonce, None)
+        self.chunks.put_nowait(None)
+
+    def __aiter__(self) -> typing.AsyncIterator["Member"]:
+        return self.iterate()
+
+    async def iterate(self) -> typing.AsyncIterator["Member"]:
+        await self.send()
+        while True:
+            try:
+                members = await asyncio.wait_for(self.chunks.get(), self.timeout)
+            except asyncio.TimeoutError:
+                self.manager.member_requests.pop(self.nonce, None)
+                raise
+            if members is None:
+                self.chunks.put_nowait(None)
+                return
+            for member in members:
+                yield member
+
+    async def wait(self) -> typing.List["Member"]:
+        """
+            Waits for the last chunk and returns every member.
+        """
+        async for _ in self:
+            pass
+        return self.members
+
+    def __await__(self):
+        return self.wait().__await__()
+
+class ShardManager:
+    """
+        Runs the gateway connections of a client, one per shard, on the client's event loop.
+        Discord sends the events of a guild on shard `(guild_id >> 22) % shard_count`.
+
+        Parameters
+        ----------
+        client: BaseClient
+            The client.
+        shard_count: int
+            The total number of shards, discord's recommendation from `/gateway/bot` is used if not given.
+        shard_ids: list
+            The shards this manager runs, all of them if not given.
+
+        Attributes
+        ----------
+        shards : dict
+            The gateway of every shard by shard id.
+        identify_scheduler : IdentifyScheduler
+            Spaces the identifies of the shards.
+        member_requests : dict
+            The member requests waiting for chunks, by nonce.
+    """
+
+    def __init__(
+        self,
+        client: "BaseClient",
+        shard_count: typing.Optional[int] = None,
+        shard_ids: typing.Optional[typing.List[int]] = None,
+    ) -> None:
+        self.client = client
+        self.shard_count = shard_count
+        self.shard_ids = shard_ids
+
+        self.shards: typing.Dict[int, Gateway] = {}
+        self.ready_shards: typing.Set[int] = set()
+        self.identify_scheduler: typing.Optional[IdentifyScheduler] = None
+        self.member_requests: typing.Dict[str, MemberRequest] = {}
+        self.nonces = itertools.count()
+
+    async def fetch_gateway(self) -> typing.Dict[str, typing.Any]:
+        """
+            Gets the recommended number of shards and the session start limit of the bot,
+            setting the shard count if it wasn't given and creating the identify scheduler.
+        """
+        data = await self.client.api.gateway_bot_get()
+        if self.shard_count is None:
+            self.shard_count = data['shards']
+            self.client.log.info(f"Using {self.shard_count} shards")
+        self.identify_scheduler = IdentifyScheduler.from_gateway(data)
+        return data
+
+    async def wait_identify(self, shard: Gateway) -> None:
+        """
+            Waits until a shard may identify, asking the cluster's parent when running in a cluster.
+
+            Parameters
+            ----------
+            shard: Gateway
+                The shard.
+        """
+        if self.client.cluster is not None:
+            delay = await self.client.cluster.identify_slot(shard.shard_id)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            return
+
+        if self.identify_scheduler is None:
+            self.identify_scheduler = IdentifyScheduler()
+        await self.identify_scheduler.wait(shard.shard_id)
+
+    async def connect(self, reconnect: bool) -> None:
+        """
+            Connects every shard and runs them until they all close.
+
+            Parameters
+            ----------
+            reconnect: bool
+                Whether to reconnect to the gateway or not.
+        """
+        if self.client.cluster is None and (self.shard_count is None or self.identify_scheduler is None):
+            await self.fetch_gateway()
+
+        shard_ids = self.shard_ids if self.shard_ids is not None else range(self.shard_count)
+        for shard_id in shard_ids:
+            if shard_id not in self.shards:
+                self.shards[shard_id] = Gateway(self.client, shard_id, self.shard_count)
+
+        await asyncio.gather(*(shard.connect(reconnect) for shard in self.shards.values()))
+
+    async def close(self) -> None:
+        """
+            Closes every shard.
+        """
+        for shard in self.shards.values():
+            await shard.close()
+
+    async def shard_ready(self, shard: Gateway) -> None:
+        """
+            Called by a shard when it receives READY, emits `shard_ready` and then `ready` once every shard is ready.
+
+            Parameters
+            ----------
+            shard: Gateway
+                The shard that is ready.
+        """
+        self.ready_shards.add(shard.shard_id)
+        await self.client.emit('shard_ready', shard.shard_id)
+
+        if self.ready_shards.issuperset(self.shards):
+            await self.client.emit('ready')
+
+    def shard_id(self, guild_id: int) -> int:
+        """
+            Gets the id of the shard a guild is on.
+
+            Parameters
+            ----------
+            guild_id: int
+                The id of the guild.
+        """
+        return (int(guild_id) >> 22) % (self.shard_count or 1)
+
+    def get_shard(self, guild_id: int) -> typing.Optional[Gateway]:
+        """
+            Gets the gateway a guild is on, None if this manager doesn't run its shard.
+
+            Parameters
+            ----------
+            guild_id: int
+                The id of the guild.
+        """
+        return self.shards.get(self.shard_id(guild_id))
+
+    def request_members(self, guild_id: int, **kwargs) -> MemberRequest:
+        """
+            Creates a request for members of a guild, it is sent once it is iterated or awaited.
+
+            Parameters
+            ----------
+            guild_id: int
+                The id of the guild.
+            kwargs:
+                The options of the request, see `MemberRequest`.
+        """
+        return MemberRequest(self, guild_id, f'{guild_id}:{next(self.nonces)}', **kwargs)
+
+    @property
+    def latencies(self) -> typing.Dict[int, typing.Optional[float]]:
+        """
+            The heartbeat latency of every shard in seconds.
+        """
+        return {shard_id: shard.latency for shard_id, shard in self.shards.items()}
+
+    @property
+    def histograms(self) -> typing.Dict[int, typing.Dict[float, int]]:
+        """
+            The rolling heartbeat latency histogram of every shard, see `Heartbeat.histogram`.
+        """
+        return {shard_id: shard.heartbeat.histogram() for shard_id, shard in self.shards.items()}
+
+    @property
+    def states(self) -> typing.Dict[int, str]:
+        """
+            The connection state of every shard.
+        """
+        return {shard_id: shard.state for shard_id, shard in self.shards.items()}
@@ -0,0 +1,244 @@
+r"""
+    :copyright: (c) 2021 by Zaid Ali (email@xarty.xyz) / Hazem Meqdad(hazemmeqdad@gmail.com).
+    :license: MIT, see LICENSE for more details.
+
+    The stores the cache keeps the models in, keyed by snowflake.
+"""
+
+import time
+import typing
+import operator
+import collections.abc
+
+T = typing.TypeVar('T')
+
+class StoreView(collections.abc.Sequence, typing.Generic[T]):
+    """
+        A read only sequence of the objects of a store, that follows its changes.
+        `len` and `in` are O(1), iterating goes over a snapshot so the store can change during the loop.
+        Indexing builds a list of the objects every time, so it is O(n), iterate or take `list(view)`
+        once instead of indexing in a loop.
+
+        Parameters
+        ----------
+        items: dict
+            The objects by id.
+    """
+    __slots__ = ('items',)
+
+    def __init__(self, items: typing.Dict[int, T]) -> None:
+        self.items = items
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> typing.Iterator[T]:
+        return iter(tuple(self.items.values()))
+
+    def __contains__(self, item: typing.Any) -> bool:
+        # The models compare equal to each other, so an object is looked up by its id and identity.
+        return self.items.get(getattr(item, 'id', None)) is item
+
+    def __getitem__(self, index):
+        return list(self.items.values())[index]
+
+    def __bool__(self) -> bool:
+        return bool(self.items)
+
+    def __repr__(self) -> str:
+        return f'<StoreView len={len(self.items)}>'
+
+class Store(typing.Generic[T]):
+    """
+        Keeps objects by id, with secondary indexes of the objects sharing a key,
+        like the messages of a channel. Getting, adding and removing an object is O(1).
+
+        Parameters
+        ----------
+        indexes:
+            The indexes, by name, to the function giving the key of an object.
+
+        Attributes
+        ----------
+        items : dict
+            The objects by id.
+        indexes : dict
+            The objects by id for every key, by index name.
+    """
+    def __init__(self, **indexes: typing.Callable[[T], typing.Any]) -> None:
+        self.items: typing.Dict[int, T] = {}
+        self.keys: typing.Dict[str, typing.Callable[[T], typing.Any]] = indexes
+        self.indexes: typing.Dict[str, typing.Dict[typing.Any, typing.Dict[int, T]]] = {name: {} for name in indexes}
+
+    @classmethod
+    def of(cls, items: typing.Iterable[T], **indexes: typing.Callable[[T], typing.Any]) -> "Store[T]":
+        """
+            Creates a store holding some objects, None items are skipped, like the channels
+            of the types `deserialize_channel` doesn't model.
+
+            Parameters
+            ----------
+            items: typing.Iterable
+                The objects.
+            indexes:
+                The indexes, by name, to the function giving the key of an object.
+        """
+        store = cls(**indexes)
+        for item in items:
+            if item is not None:
+                store.add(item)
+        return store
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def __iter__(self) -> typing.Iterator[T]:
+        return iter(tuple(self.items.values()))
+
+    def __contains__(self, id: int) -> bool:
+        return id in self.items
+
+    def get(self, id: typing.Union[int, str, None]) -> typing.Optional[T]:
+        """
+            Gets an object by id.
+
+            Parameters
+            ----------
+            id: int
+                The id, as int or str.
+        """
+        if id is None:
+            return None
+        return self.items.get(id if type(id) is int else int(id))
+
+    def add(self, item: T) -> T:
+        """
+            Adds an object, replacing the object with the same id.
+
+            Parameters
+            ----------
+            item: typing.Any
+                The object.
+        """
+        self.remove(item.id)
+        self.items[item.id] = item
+        for name, key in self.keys.items():
+            self.indexes[name].setdefault(key(item), {})[item.id] = item
+        return item
+
+    def remove(self, id: typing.Union[int, str]) -> typing.Optional[T]:
+        """
+            Removes an object by id and returns it.
+
+            Parameters
+            ----------
+            id: int
+                The id.
+        """
+        id = id if type(id) is int else int(id)
+        item = self.items.pop(id, None)
+        if item is None:
+            return None
+        for name, key in self.keys.items():
+            index = self.indexes[name]
+            value = key(item)
+            bucket = index.get(value)
+            if bucket is not None:
+                bucket.pop(id, None)
+                if not bucket:
+                    del index[value]
+        return item
+
+    def clear(self) -> None:
+        """
+            Removes every object.
+        """
+        self.items.clear()
+        for index in self.indexes.values():
+            index.clear()
+
+    def view(self) -> StoreView[T]:
+        """
+            A read only sequence of the objects, that follows the changes of the store.
+        """
+        return StoreView(self.items)
+
+class MessageStore(Store[T]):
+    """
+        The store of the messages, it forgets the least recently used ones past its limits.
+        Messages are indexed by `channel_id`. The events of messages that were forgotten
+        can still be handled with the `raw_` events, which get the payload.
+
+        Parameters
+        ----------
+        max_messages: int
+            The number of messages kept, no limit if None and no messages are kept if 0.
+        per_channel: int
+            The number of messages kept per channel, the oldest of a channel is forgotten first. No limit if None.
+        ttl: float
+            The seconds a message is kept after it was last added or got, no limit if None.
+    """
+    def __init__(
+        self,
+        max_messages: typing.Optional[int] = 1000,
+        per_channel: typing.Optional[int] = None,
+        ttl: typing.Optional[float] = None,
+    ) -> None:
+        super().__init__(channel_id=operator.attrgetter('channel_id'))
+        self.max_messages = max_messages
+        self.per_channel = per_channel
+        self.ttl = ttl
+
+        self.used_at: typing.Dict[int, float] = {}
+
+    def get(self, id: typing.Union[int, str, None]) -> typing.Optional[T]:
+        if id is None:
+            return None
+        id = id if type(id) is int else int(id)
+        item = self.items.pop(id, None)
+        if item is None:
+            return None
+
+        # Getting a message moves it to the end, so the front of `items` is always the least recently used.
+        self.items[id] = item
+        if self.ttl is not None:
+            now = time.monotonic()
+            if now - self.used_at.pop(id) > self.ttl:
+                self.remove(id)
+                return None
+            self.used_at[id] = now
+        return item
+
+    def add(self, item: T) -> T:
+        if self.max_messages == 0:
+            return item
+        super().add(item)
+
+        if self.ttl is not None:
+            self.used_at.pop(item.id, None)
+            self.used_at[item.id] = now = time.monotonic()
+            while self.used_at:
+                id = next(iter(self.used_at))
+                if now - self.used_at[id] <= self.ttl:
+                    break
+                self.remove(id)
+
+        if self.per_channel is not None:
+            channel = self.indexes['channel_id'][item.channel_id]
+            while len(channel) > self.per_channel:
+                self.remove(next(iter(channel)))
+
+        if self.max_messages is not None:
+            while len(self.items) > self.max_messages:
+                self.remove(next(iter(self.items)))
+        return item
+
+    def remove(self, id: typing.Union[int, str]) -> typing.Optional[T]:
+        item = super().remove(id)
+        if item is not None:
+            self.used_at.pop(item.id, None)
+        return item
+
+    def clear(self) -> None:
+        super().clear()
+        self.used_at.clear()
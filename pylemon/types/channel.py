@@ -291,7 +291,7 @@ class VoiceChannel(GuildChannel):
         super().__init__(client, guild_id, data)
 
     async def connect(self):
-        await self.client.gateway.send(4,{
+        await self.client.get_shard(self.guild_id).send(4,{
             "guild_id": self.guild_id,
             "channel_id": self.id,
         })
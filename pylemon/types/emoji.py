@@ -9,6 +9,8 @@ import dataclasses
 if typing.TYPE_CHECKING:
     from pylemon.client import BaseClient
 
+from .types import snowflake
+
 @dataclasses.dataclass(init=True)
 class Emoji:
     """
@@ -37,7 +39,7 @@ class Emoji:
         self.client = client
         
         self.guild_id: int = guild_id
-        self.id: int = data.get('id')
+        self.id: int = snowflake(data.get('id'))
         self.name: str = data.get('name')
         self.roles: typing.Union[list,None] = data.get('roles')
         self.available: bool = data.get('available',None)
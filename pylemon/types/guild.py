@@ -8,6 +8,7 @@ import dataclasses
 
 if typing.TYPE_CHECKING:
     from pylemon.client import BaseClient
+    from pylemon.shard import MemberRequest
 
 from pylemon.types.channel import TextChannel, ChannelsTypes
 from pylemon.types.member import Member
@@ -15,7 +16,7 @@ from pylemon.types.role import Role
 from pylemon.types.sticker import Sticker
 from pylemon.types.emoji import Emoji
 from pylemon.types.voice import VoiceState
-from pylemon.types.user import User
+from pylemon.store import Store
 
 
 from rich import print
@@ -116,31 +117,102 @@ class Guild:
         self.nfsw_level: int = snowflake(data.get('nfsw_level'))
         self.premium_progress_bar_enabled: bool = data.get('premium_progress_bar_enabled')
 
-        self.channels: typing.List["ChannelsTypes"] = [
-            deserialize_channel(client,self.id, channel) for channel in data.get('channels')
-        ]
-        self.members: typing.List["Member"] = [
-            Member(client, self.id, member['user'] , member) for member in data.get('members')
-        ]
-        self.users: typing.List["User"] = [
-            User(client, user['user']) for user in data.get('members')
-        ]
-        self.roles: typing.List["Role"] = [
-            Role(client, self.id, role) for role in data.get('roles')
-        ]
-        self.emojis: typing.List["Emoji"] = [
-            Emoji(client, self.id, emoji) for emoji in data.get('emojis')
-        ]
-        self.stickers: typing.List["Sticker"] = [
-            Sticker(client, self.id, sticker) for sticker in data.get('stickers')
-        ]
-        self.threads: typing.List["TextChannel"] = [
-            TextChannel(client, self.id, channel) for channel in data.get('threads')
-        ]
+        # Only the collections the cache policy keeps are built, the others stay empty.
+        policy = client.cache_policy
+        self.channel_store: Store["ChannelsTypes"] = Store.of(
+            deserialize_channel(client,self.id, channel) for channel in (data.get('channels', []) if policy.channels else ())
+        )
         self.voicestates: typing.List["VoiceState"] = [
-            VoiceState(client, self.id , state) for state in data.get('voice_states')
+            VoiceState(client, self.id , state) for state in (data.get('voice_states', []) if policy.voice_states else ())
         ]
-        
+        wanted = self.wanted_members(data)
+        self.member_store: Store["Member"] = Store.of(
+            Member(client, self.id, member['user'] , member) for member in data.get('members', [])
+            if wanted is None or int(member['user']['id']) in wanted
+        )
+        self.role_store: Store["Role"] = Store.of(
+            Role(client, self.id, role) for role in (data.get('roles', []) if policy.roles else ())
+        )
+        self.emoji_store: Store["Emoji"] = Store.of(
+            Emoji(client, self.id, emoji) for emoji in (data.get('emojis', []) if policy.emojis else ())
+        )
+        self.sticker_store: Store["Sticker"] = Store.of(
+            Sticker(client, self.id, sticker) for sticker in (data.get('stickers', []) if policy.stickers else ())
+        )
+        self.thread_store: Store["TextChannel"] = Store.of(
+            TextChannel(client, self.id, channel) for channel in (data.get('threads', []) if policy.threads else ())
+        )
+
+        self.channels: typing.Sequence["ChannelsTypes"] = self.channel_store.view()
+        self.members: typing.Sequence["Member"] = self.member_store.view()
+        self.roles: typing.Sequence["Role"] = self.role_store.view()
+        self.emojis: typing.Sequence["Emoji"] = self.emoji_store.view()
+        self.stickers: typing.Sequence["Sticker"] = self.sticker_store.view()
+        self.threads: typing.Sequence["TextChannel"] = self.thread_store.view()
+
+    @property
+    def shard_id(self) -> int:
+        """
+            The id of the shard the guild is on.
+        """
+        return self.client.shards.shard_id(self.id)
+
+    @property
+    def chunked(self) -> bool:
+        """
+            Whether every member of the guild is cached.
+        """
+        return len(self.member_store) >= (self.member_count or 0)
+
+    def chunk(self, presences: bool = False, timeout: float = 30.0) -> "MemberRequest":
+        """
+            Gets every member of the guild over the gateway, it needs the `GUILD_MEMBERS` intent.
+            The members are cached while their chunks arrive, so the request can be iterated
+            with `async for` to use them before the last chunk, or awaited to get all of them.
+
+            Parameters
+            ----------
+            presences: bool
+                Whether to get the presences of the members, needs the `GUILD_PRESENCES` intent.
+            timeout: float
+                The seconds to wait for the next chunk.
+        """
+        return self.client.shards.request_members(self.id, presences=presences, timeout=timeout)
+
+    def query_members(
+        self,
+        query: str = '',
+        limit: int = 100,
+        user_ids: typing.Optional[typing.List[int]] = None,
+        presences: bool = False,
+        timeout: float = 30.0,
+    ) -> "MemberRequest":
+        """
+            Gets the members whose username starts with a query, or the members with some ids, over the gateway.
+            Like `chunk`, the request can be iterated with `async for` or awaited.
+
+            Parameters
+            ----------
+            query: str
+                The start of the usernames.
+            limit: int
+                The maximum number of members, up to 100.
+            user_ids: list
+                The ids of the members to get instead of a query, up to 100.
+            presences: bool
+                Whether to get the presences of the members, needs the `GUILD_PRESENCES` intent.
+            timeout: float
+                The seconds to wait for the next chunk.
+        """
+        return self.client.shards.request_members(
+            self.id,
+            query=query,
+            limit=limit,
+            user_ids=user_ids,
+            presences=presences,
+            timeout=timeout,
+        )
+
     # Get method
 
     def get_channel(self, id: int) -> "ChannelsTypes":
@@ -152,9 +224,7 @@ class Guild:
             id: int
                 The id of the channel.
         """
-        for channel in self.channels:
-            if channel.id == int(id):
-                return channel
+        return self.channel_store.get(id)
 
     def get_role(self, id: int) -> "Role":
         """
@@ -165,9 +235,7 @@ class Guild:
             id: int
                 The id of the role.
         """
-        for role in self.roles:
-            if role.id == int(id):
-                return role
+        return self.role_store.get(id)
 
     def get_member(self, id: int) -> "Member":
         """
@@ -178,9 +246,33 @@ class Guild:
             id: int
                 The id of the member.
         """
-        for member in self.members:
-            if member.id == int(id):
-                return member
+        return self.member_store.get(id)
+
+    def wanted_members(self, data: typing.Dict[str, typing.Any]) -> typing.Optional[typing.Set[int]]:
+        """
+            Gets the ids of the members of a guild or members chunk payload that the client's
+            cache policy keeps, None when every member is kept.
+
+            Parameters
+            ----------
+            data: dict
+                The payload.
+        """
+        policy = self.client.cache_policy.members
+        if policy == 'everyone':
+            return None
+
+        wanted = set()
+        if self.client.user is not None:
+            wanted.add(self.client.user.id)
+        if policy == 'online':
+            wanted.update(
+                int(presence['user']['id']) for presence in data.get('presences', [])
+                if presence.get('status', 'offline') != 'offline'
+            )
+        elif policy == 'voice':
+            wanted.update(state.user_id for state in self.voicestates if state.channel_id is not None)
+        return wanted
 
     def get_emoji(self, id: int) -> "Emoji":
         """
@@ -191,9 +283,7 @@ class Guild:
             id: int
                 The id of the emoji.
         """
-        for emoji in self.emojis:
-            if emoji.id == int(id):
-                return emoji
+        return self.emoji_store.get(id)
 
     def get_sticker(self, id: int) -> "Sticker":
         """
@@ -204,9 +294,7 @@ class Guild:
             id: int
                 The id of the sticker.
         """
-        for sticker in self.stickers:
-            if sticker.id == int(id):
-                return sticker
+        return self.sticker_store.get(id)
 
     # API
 
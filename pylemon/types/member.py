@@ -14,15 +14,20 @@ if typing.TYPE_CHECKING:
     )
 
 from .user import User
+from .types import snowflake
 
 @dataclasses.dataclass(init=True)
 class Member(User):
     """
         This is the Member class that is used to simplify the usage of the member object.
         It is used to simplify the usage of the member object by providing a more readable interface.
+        The user fields, like `username` or `avatar`, are read from `user`, the cached user is shared
+        by the members of every guild instead of being built again for each of them.
 
         Attributes
         ----------
+        user : User
+            The user of the member.
         guild_id : int
             The guild id.
         nick : str
@@ -38,18 +43,31 @@ class Member(User):
         self,
         client: "BaseClient",
         guild_id: int,
-        user: typing.Dict[str, typing.Union[str,dict,list,int,float,bool]],
+        user: typing.Union[typing.Dict[str, typing.Union[str,dict,list,int,float,bool]], User],
         data: typing.Dict[str, typing.Union[str,dict,list,int,float,bool]],
     ) -> None:
         self.client = client
 
+        if not isinstance(user, User):
+            # The payload is newer than the cached user, which every member of the user shares.
+            cached = client.get_user(user['id'])
+            if cached is None:
+                user = User(client, user)
+            else:
+                cached.update(user)
+                user = cached
+        self.user: User = user
+        self.id: int = user.id
         self.guild_id: int = guild_id
         self.nick: typing.Union[str,None] = data.get('nick')
-        self.roles_id: typing.Union[list,None] = data.get('roles')
+        self.roles_id: typing.Union[typing.List[int],None] = [snowflake(role) for role in data.get('roles', [])]
         self.joined_at: typing.Union[str,None] = data.get('joined_at')
         self.premium_since: typing.Union[str,None] = data.get('premium_since')
 
-        super().__init__(client, user)
+    def __getattr__(self, name: str) -> typing.Any:
+        if name == 'user':
+            raise AttributeError(name)
+        return getattr(self.user, name)
 
     @property
     def guild(self) -> "Guild":
@@ -68,7 +86,8 @@ class Member(User):
             This is a property that returns the roles of the member.
         """
         if self.roles_id:
-            return [role for role in self.guild.roles if str(role.id) in self.roles_id]
+            guild = self.guild
+            return [role for role in map(guild.get_role, self.roles_id) if role is not None]
 
     @property
     def highest_role(self) -> typing.Union["Role",None]:
@@ -9,6 +9,8 @@ import dataclasses
 if typing.TYPE_CHECKING:
     from pylemon.client import BaseClient
 
+from .types import snowflake
+
 @dataclasses.dataclass(init=True)
 class Sticker:
     def __init__(
@@ -20,7 +22,7 @@ class Sticker:
         self.client = client
 
         self.guild_id: int = guild_id
-        self.id = data.get('id',None)
+        self.id: int = snowflake(data.get('id'))
         self.pack_id = data.get('pack_id',None)
         self.name = data.get('name',None)
         self.description = data.get('description',None)
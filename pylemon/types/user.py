@@ -66,22 +66,7 @@ class User:
         data: typing.Dict[str, typing.Union[str,dict,list,int,float,bool]],
     ) -> None:
         self.client = client
-
-        self.id: int = int(data.get("id"))
-        self.username: str = data.get("username")
-        self.discriminator: str = data.get("discriminator")
-        self.avatar: typing.Union[str, None] = data.get("avatar")
-        self.banner: typing.Union[str, None] = data.get("banner")
-        self.banner_color: typing.Union[str, None] = data.get("banner_color")
-        self.accent_color: typing.Union[int, None] = data.get("accent_color")
-        self.bot: bool = data.get("bot", False)
-        self.system: typing.Union[bool, None] = data.get("system")
-        self.mfa_enabled: typing.Union[bool, None] = data.get("mfa_enabled")
-        self.locale: typing.Union[str, None] = data.get("locale")
-        self.verified: typing.Union[bool, None] = data.get("verified")
-        self.premium_type: typing.Union[int, None] = data.get("premium_type")
-        self.public_flags: typing.Union[int, None] = data.get("public_flags")
-
+        self.update(data)
 
         self.flags_dict: typing.Dict[str,int] = {
             "DISCORD_EMPLOYEE": 1 << 0,
@@ -100,6 +85,30 @@ class User:
             "DISCORD_CERTIFIED_MODERATOR": 1 << 18
         }
         
+    def update(self, data: typing.Dict[str, typing.Union[str,dict,list,int,float,bool]]) -> None:
+        """
+            Updates the user from a newer user object.
+
+            Parameters
+            ----------
+            data : dict
+                The user object.
+        """
+        self.id: int = int(data.get("id"))
+        self.username: str = data.get("username")
+        self.discriminator: str = data.get("discriminator")
+        self.avatar: typing.Union[str, None] = data.get("avatar")
+        self.banner: typing.Union[str, None] = data.get("banner")
+        self.banner_color: typing.Union[str, None] = data.get("banner_color")
+        self.accent_color: typing.Union[int, None] = data.get("accent_color")
+        self.bot: bool = data.get("bot", False)
+        self.system: typing.Union[bool, None] = data.get("system")
+        self.mfa_enabled: typing.Union[bool, None] = data.get("mfa_enabled")
+        self.locale: typing.Union[str, None] = data.get("locale")
+        self.verified: typing.Union[bool, None] = data.get("verified")
+        self.premium_type: typing.Union[int, None] = data.get("premium_type")
+        self.public_flags: typing.Union[int, None] = data.get("public_flags")
+
     def has_flag(self, flag: str) -> bool:
         """
             Checks if the user has the specified flag.
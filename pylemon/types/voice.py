@@ -10,6 +10,7 @@ if typing.TYPE_CHECKING:
     from pylemon.client import BaseClient
 
 from .types import snowflake
+from .member import Member
 
 @dataclasses.dataclass(init=True)
 class VoiceState:
@@ -35,6 +36,9 @@ class VoiceState:
         self.self_video: bool = data.get('self_video',None)
         self.stream: bool = data.get('stream',None)
         self.video: bool = data.get('video',None)
+        self.member: typing.Union[Member, None] = (
+            Member(client, guild_id, data['member']['user'], data['member']) if data.get('member') else None
+        )
 
 @dataclasses.dataclass(init=True)
 class VoiceServer:
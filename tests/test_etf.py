@@ -0,0 +1,104 @@
+r"""
+    :copyright: (c) 2021 by Zaid Ali (email@xarty.xyz) / Hazem Meqdad(hazemmeqdad@gmail.com).
+    :license: MIT, see LICENSE for more details.
+"""
+
+import zlib
+import struct
+import unittest
+
+from pylemon.etf import ETFCodec, ETFDecodeError
+
+class ETFCodecTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.codec = ETFCodec()
+
+    def roundtrip(self, obj):
+        return self.codec.loads(self.codec.dumps(obj))
+
+    def test_small_ints(self) -> None:
+        for value in (0, 1, 255):
+            data = self.codec.dumps(value)
+            self.assertEqual(data[1], 97)
+            self.assertEqual(self.codec.loads(data), value)
+
+    def test_ints(self) -> None:
+        for value in (256, -1, -2 ** 31, 2 ** 31 - 1):
+            data = self.codec.dumps(value)
+            self.assertEqual(data[1], 98)
+            self.assertEqual(self.codec.loads(data), value)
+
+    def test_large_ints(self) -> None:
+        for value in (2 ** 31, -2 ** 31 - 1, 175928847299117063, 2 ** 64 - 1, -(2 ** 200)):
+            data = self.codec.dumps(value)
+            self.assertEqual(data[1], 110)
+            self.assertEqual(self.codec.loads(data), value)
+
+    def test_large_big_ext(self) -> None:
+        value = 2 ** 2100
+        digits = value.to_bytes((value.bit_length() + 7) // 8, 'little')
+        data = b'\x83\x6f' + struct.pack('>I', len(digits)) + b'\x00' + digits
+        self.assertEqual(self.codec.loads(data), value)
+
+    def test_binaries(self) -> None:
+        for value in ('', 'hello', 'héllo ☃'):
+            self.assertEqual(self.roundtrip(value), value)
+        self.assertEqual(self.roundtrip(b'raw'), 'raw')
+
+    def test_floats(self) -> None:
+        self.assertEqual(self.roundtrip(1.5), 1.5)
+        self.assertEqual(self.codec.loads(b'\x83\x63' + b'2.5'.ljust(31, b'\x00')), 2.5)
+
+    def test_atoms(self) -> None:
+        for value in (None, True, False):
+            self.assertIs(self.roundtrip(value), value)
+        self.assertEqual(self.codec.loads(b'\x83\x64\x00\x05hello'), 'hello')
+        self.assertEqual(self.codec.loads(b'\x83\x73\x02ok'), 'ok')
+        self.assertEqual(self.codec.loads(b'\x83\x76\x00\x03nil'), None)
+        self.assertEqual(self.codec.loads(b'\x83\x77\x04true'), True)
+
+    def test_nested_maps(self) -> None:
+        payload = {
+            'op': 0,
+            's': 42,
+            't': 'GUILD_CREATE',
+            'd': {
+                'id': 175928847299117063,
+                'large': False,
+                'icon': None,
+                'roles': [{'id': 1, 'permissions': '0'}, {'id': 2 ** 40, 'name': 'mod'}],
+                'members': [],
+                'nested': {'a': {'b': {'c': [1, -1, 'x']}}},
+            },
+        }
+        self.assertEqual(self.roundtrip(payload), payload)
+
+    def test_lists_and_tuples(self) -> None:
+        self.assertEqual(self.roundtrip([]), [])
+        self.assertEqual(self.roundtrip([1, [2, [3]]]), [1, [2, [3]]])
+        self.assertEqual(self.roundtrip((1, 'a')), [1, 'a'])
+        self.assertEqual(self.codec.loads(b'\x83\x68\x02\x61\x01\x61\x02'), (1, 2))
+        self.assertEqual(self.codec.loads(b'\x83\x6b\x00\x03abc'), 'abc')
+
+    def test_version_byte(self) -> None:
+        self.assertEqual(self.codec.dumps({})[0], 131)
+        with self.assertRaises(ETFDecodeError):
+            self.codec.loads(b'\x82\x61\x01')
+        with self.assertRaises(ETFDecodeError):
+            self.codec.loads(b'')
+
+    def test_compressed(self) -> None:
+        term = self.codec.dumps({'d': list(range(100))})[1:]
+        data = b'\x83\x50' + struct.pack('>I', len(term)) + zlib.compress(term)
+        self.assertEqual(self.codec.loads(data), {'d': list(range(100))})
+
+    def test_errors(self) -> None:
+        with self.assertRaises(ETFDecodeError):
+            self.codec.loads(self.codec.dumps({'a': 'b'})[:-1])
+        with self.assertRaises(ETFDecodeError):
+            self.codec.loads(b'\x83\x01')
+        with self.assertRaises(TypeError):
+            self.codec.dumps(object())
+
+if __name__ == '__main__':
+    unittest.main()
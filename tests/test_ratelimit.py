@@ -0,0 +1,39 @@
+r"""
+    :copyright: (c) 2021 by Zaid Ali (email@xarty.xyz) / Hazem Meqdad(hazemmeqdad@gmail.com).
+    :license: MIT, see LICENSE for more details.
+"""
+
+import asyncio
+import unittest
+
+from pylemon.ratelimit import Bucket
+
+class BucketTest(unittest.IsolatedAsyncioTestCase):
+    async def test_new_bucket_sends_one_request(self) -> None:
+        bucket = Bucket('key')
+        await bucket.acquire()
+        waiters = [asyncio.create_task(bucket.acquire()) for _ in range(3)]
+        await asyncio.sleep(0.05)
+        self.assertFalse(any(waiter.done() for waiter in waiters))
+
+        bucket.update(5, 4, 1.0)
+        await asyncio.wait_for(asyncio.gather(*waiters), 1)
+        self.assertEqual(bucket.remaining, 1)
+
+    async def test_response_without_headers(self) -> None:
+        bucket = Bucket('key')
+        await bucket.acquire()
+        waiter = asyncio.create_task(bucket.acquire())
+        bucket.update(None, None, None)
+        await asyncio.wait_for(waiter, 1)
+        self.assertIsNone(bucket.remaining)
+
+    async def test_lost_first_request(self) -> None:
+        bucket = Bucket('key')
+        bucket.DISCOVERY_TIMEOUT = 0.05
+        await bucket.acquire()
+        await asyncio.wait_for(bucket.acquire(), 1)
+        self.assertFalse(bucket.discovered.is_set())
+
+if __name__ == '__main__':
+    unittest.main()
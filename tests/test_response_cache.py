@@ -0,0 +1,41 @@
+r"""
+    :copyright: (c) 2021 by Zaid Ali (email@xarty.xyz) / Hazem Meqdad(hazemmeqdad@gmail.com).
+    :license: MIT, see LICENSE for more details.
+"""
+
+import unittest
+
+from pylemon.http import ResponseCache, Route
+
+class ResponseCacheTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.cache = ResponseCache()
+        self.webhooks = (Route('/channels/{channel_id}/webhooks', 'GET', channel_id=1), None)
+        self.cache.set(self.webhooks, [{'id': '10'}])
+
+    def test_get(self) -> None:
+        self.assertEqual(self.cache.get(self.webhooks), [{'id': '10'}])
+
+    def test_write_to_the_resource(self) -> None:
+        self.cache.written(Route('/channels/{channel_id}/webhooks', 'POST', channel_id=1))
+        self.assertIsNone(self.cache.get(self.webhooks))
+
+    def test_write_to_a_sub_resource(self) -> None:
+        self.cache.written(Route(
+            '/channels/{channel_id}/webhooks/{webhook_id}', 'DELETE', channel_id=1, webhook_id=10,
+        ))
+        self.assertIsNone(self.cache.get(self.webhooks))
+        self.assertEqual(self.cache.resources, {})
+
+    def test_write_to_another_channel(self) -> None:
+        self.cache.written(Route(
+            '/channels/{channel_id}/webhooks/{webhook_id}', 'DELETE', channel_id=2, webhook_id=10,
+        ))
+        self.assertEqual(self.cache.get(self.webhooks), [{'id': '10'}])
+
+    def test_invalidate(self) -> None:
+        self.cache.invalidate('/channels/{channel_id}/webhooks', channel_id=1)
+        self.assertIsNone(self.cache.get(self.webhooks))
+
+if __name__ == '__main__':
+    unittest.main()